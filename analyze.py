@@ -0,0 +1,173 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import time
+from game.position import Position, move_name
+from game.transposition import mate_in_moves
+from pieces.piece import WHITE, COLOR_NAMES
+from players.computer_player import Computer
+
+# Scores a file of positions offline, one FEN or EPD position per line, and writes one JSON result per line:
+#   python analyze.py positions.epd --depth 4 --workers 8 > results.jsonl
+
+# Every worker process keeps its own Computer and clears its transposition table for every position, so a result
+# doesn't depend on which positions the worker searched before
+worker_computer = None
+
+
+def initialize_worker(hash_size_mb, algorithm, null_move_pruning, late_move_reductions):
+  global worker_computer
+  worker_computer = Computer("White", hash_size_mb, algorithm=algorithm, null_move_pruning=null_move_pruning,
+                             late_move_reductions=late_move_reductions)
+
+
+def parse_position(line):
+  """
+  Splits a FEN or EPD line into its position and its EPD operations (like id "..."; bm e4;).
+  Returns the FEN of the position and a dict of the operations.
+  """
+  fields = line.split()
+  fen_fields = fields[:4]
+  rest = fields[4:]
+
+  # a FEN has a halfmove clock and fullmove number where an EPD has its operations
+  while rest and rest[0].isdigit() and len(fen_fields) < 6:
+    fen_fields.append(rest.pop(0))
+
+  operations = {}
+  for operation in " ".join(rest).split(";"):
+    opcode, _, operand = operation.strip().partition(" ")
+    if opcode:
+      operations[opcode] = operand.strip().strip('"')
+
+  return " ".join(fen_fields), operations
+
+
+def analyze_position(task):
+  """
+  Searches a single position in a worker process and returns its result as a dict.
+  """
+  line_number, line, max_depth, time_budget_ms, node_limit = task
+  fen, operations = parse_position(line)
+  result = {"line": line_number, "fen": fen}
+  if "id" in operations:
+    result["id"] = operations["id"]
+
+  # positions without one king per side or with the side not to move in check are rejected here, before the search
+  try:
+    position = Position.from_fen(fen)
+  except ValueError as error:
+    result["error"] = str(error)
+    return result
+
+  # one position that breaks the search shouldn't end a run over a whole file
+  try:
+    result.update(search_position(position, max_depth, time_budget_ms, node_limit))
+  except Exception as error:
+    result["error"] = f"{type(error).__name__}: {error}"
+  finally:
+    worker_computer.profiler.reset_profiler()
+
+  if "bm" in operations:
+    result["bm"] = operations["bm"]
+  return result
+
+
+def search_position(position, max_depth, time_budget_ms, node_limit):
+  """
+  Searches a position with the Computer of this worker and returns its result fields.
+  """
+  computer = worker_computer
+  computer.color = COLOR_NAMES[position.side]
+  computer.transposition_table.clear()
+  computer.reset_visualizer_stats()
+
+  completed_depth = [0]
+
+  def report(depth, score, move):
+    completed_depth[0] = depth
+
+  start_time = time.time()
+  score, move = computer.iterative_deepening(position, None, time_budget_ms, max_depth, node_limit, report)
+  elapsed_time = time.time() - start_time
+
+  # scores are reported from the point of view of the side to move, like in UCI
+  if position.side != WHITE:
+    score = -score
+
+  result = {"bestmove": move_name(move) if move is not None else None}
+  mate = mate_in_moves(score)
+  if mate is not None:
+    result["mate"] = mate
+  else:
+    result["score"] = int(score)
+  result["depth"] = completed_depth[0]
+  result["nodes"] = computer.moves_evaluated
+  result["null_move_cutoffs"] = computer.null_move_cutoffs
+  result["reduced_moves"] = computer.reduced_moves
+  result["re_searches"] = computer.reduction_re_searches
+  result["time"] = round(elapsed_time, 3)
+  return result
+
+
+def analyze_positions(lines, workers, max_depth, time_budget_ms=None, node_limit=None, hash_size_mb=16, algorithm="minimax",
+                      null_move_pruning=True, late_move_reductions=True):
+  """
+  Yields the results of the positions in lines, in the same order. Only a few positions per worker are read ahead,
+  so memory use doesn't grow with the number of lines.
+  """
+  max_pending = workers * 4
+  initial_arguments = (hash_size_mb, algorithm, null_move_pruning, late_move_reductions)
+  with multiprocessing.Pool(workers, initialize_worker, initial_arguments) as pool:
+    pending = collections.deque()
+    for line_number, line in enumerate(lines, 1):
+      line = line.strip()
+      if not line or line.startswith("#"):
+        continue
+
+      task = (line_number, line, max_depth, time_budget_ms, node_limit)
+      pending.append(pool.apply_async(analyze_position, (task,)))
+      if len(pending) >= max_pending:
+        yield pending.popleft().get()
+
+    while pending:
+      yield pending.popleft().get()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Search every position of a FEN or EPD file and write the results as JSON lines.")
+  parser.add_argument("input", nargs="?", default="-", help="file with one position per line (default: standard input)")
+  parser.add_argument("-o", "--output", default="-", help="file to write the results to (default: standard output)")
+  parser.add_argument("--depth", type=int, help="search depth per position (default 4, or unlimited with --movetime or --nodes)")
+  parser.add_argument("--movetime", type=int, help="search time per position in milliseconds")
+  parser.add_argument("--nodes", type=int, help="number of nodes to search per position")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+  parser.add_argument("--hash", type=int, default=16, help="transposition table size per worker in MB (default 16)")
+  parser.add_argument("--algorithm", choices=Computer.ALGORITHMS, default="minimax", help="search algorithm (default minimax)")
+  parser.add_argument("--no-null-move", action="store_true", help="turn off null move pruning")
+  parser.add_argument("--no-lmr", action="store_true", help="turn off late move reductions")
+  args = parser.parse_args()
+
+  max_depth = args.depth
+  if max_depth is None:
+    max_depth = 64 if args.movetime or args.nodes else 4
+
+  input_file = sys.stdin if args.input == "-" else open(args.input)
+  output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+  try:
+    for result in analyze_positions(input_file, max(1, args.workers), max_depth, args.movetime, args.nodes, args.hash,
+                                    args.algorithm, not args.no_null_move, not args.no_lmr):
+      output_file.write(json.dumps(result) + "\n")
+      output_file.flush()
+  finally:
+    if input_file is not sys.stdin:
+      input_file.close()
+    if output_file is not sys.stdout:
+      output_file.close()
+
+
+if __name__ == "__main__":
+  main()
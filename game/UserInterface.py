@@ -1,8 +1,9 @@
 import tkinter as tk
 from PIL import Image, ImageTk
 import pygame
-from game.constants import width, height, square_size, themes
+from game.constants import width, height, square_size, themes, difficulties
 from game.game import Game
+from game.board_view import BoardView
 import threading
 
 
@@ -71,9 +72,8 @@ class SinglePlayer(object):
     main_menu = tk.Button(self.root, text="Main Menu", command=self.main_menu)
     main_menu.place(x=150, y=20, height=40, width=100)
 
-    difficulties = [("Easy", "(Depth-2)"), ("Medium", "(Depth-3)"), ("Hard", "(Depth-4)"),
-                    ("Veteran", "(Depth-5)"), ("Expert", "(Depth-6)")]
-    difficulty_selection = tk.OptionMenu(self.root, self.difficulty, *difficulties)
+    difficulty_options = [(name, f"(Depth-{depth}, {time_budget // 1000}s)") for name, depth, time_budget in difficulties]
+    difficulty_selection = tk.OptionMenu(self.root, self.difficulty, *difficulty_options)
     difficulty_selection.place(x=130, y=140, height=32, width=140)
 
     if self.color == "":
@@ -113,25 +113,11 @@ class SinglePlayer(object):
     if self.color != "" and self.difficulty != "PY_VAR0":
       difficulty = self.difficulty.get()
 
-      if "Easy" in difficulty:
-        single_player_game(self.color, 0, 2)
-        self.root.destroy()
-
-      elif "Medium" in difficulty:
-        single_player_game(self.color, 0, 3)
-        self.root.destroy()
-
-      elif "Hard" in difficulty:
-        single_player_game(self.color, 0, 4)
-        self.root.destroy()
-
-      elif "Veteran" in difficulty:
-        single_player_game(self.color, 0, 5)
-        self.root.destroy()
-
-      elif "Expert" in difficulty:
-        single_player_game(self.color, 0, 6)
-        self.root.destroy()
+      for name, depth, time_budget in difficulties:
+        if name in difficulty:
+          single_player_game(self.color, 0, depth, time_budget)
+          self.root.destroy()
+          break
 
 
 class Multiplayer(object):
@@ -174,8 +160,7 @@ def multiplayer_game(color, theme):
   pygame.init()
   game_window = pygame.display.set_mode((width, height))
   pygame.display.set_caption("Chess w/ Minimax Visualizer by Jeffery Xie")
-  chess_game = Game(game_window, color, theme)
-  chess_game.board.initiate_pieces()
+  chess_game = Game(BoardView(game_window), color, theme)
   fps = 60
   clock = pygame.time.Clock()
   running = True
@@ -185,6 +170,10 @@ def multiplayer_game(color, theme):
       if event.type == pygame.QUIT:
         running = False
 
+      # the window was uncovered, so the parts that didn't change have to be drawn again too
+      if event.type == pygame.VIDEOEXPOSE:
+        chess_game.view.invalidate()
+
       if event.type == pygame.MOUSEBUTTONDOWN:
         mouse_xy = pygame.mouse.get_pos()
         row, col = calc_mouse_pos(mouse_xy)
@@ -207,12 +196,14 @@ def multiplayer_game(color, theme):
   pygame.quit()
 
 
-def single_player_game(color, theme, depth):
+def single_player_game(color, theme, depth, time_budget=None):
   pygame.init()
   game_window = pygame.display.set_mode((width, height))
-  pygame.display.set_caption(f"Chess w/ Minimax Visualizer by Jeffery Xie - (AI Depth - {depth})")
-  chess_game = Game(game_window, color, theme)
-  chess_game.board.initiate_pieces()
+  if time_budget:
+    pygame.display.set_caption(f"Chess w/ Minimax Visualizer by Jeffery Xie - (AI Depth - {depth}, {time_budget // 1000}s)")
+  else:
+    pygame.display.set_caption(f"Chess w/ Minimax Visualizer by Jeffery Xie - (AI Depth - {depth})")
+  chess_game = Game(BoardView(game_window), color, theme)
   fps = 60
   clock = pygame.time.Clock()
   running = True
@@ -221,8 +212,14 @@ def single_player_game(color, theme, depth):
   # Function to handle AI move generation in a separate thread
   def multithread_minimax():
     nonlocal ai_thinking  # Access the ai_thinking flag
-    _, move = chess_game.computer.minimax(chess_game.board, chess_game, depth,
-                                          float("-inf"), float("inf"), chess_game.computer.color)
+    position = chess_game.get_position()
+    if time_budget:
+      _, move = chess_game.computer.iterative_deepening(position, chess_game, time_budget, depth)
+    else:
+      chess_game.computer.new_search()
+      _, move = chess_game.computer.minimax(position, chess_game, depth,
+                                            float("-inf"), float("inf"), chess_game.computer.color)
+    chess_game.search_snapshots.clear()
     chess_game.computer.computer_move(chess_game, move)
     ai_thinking = False  # Reset the flag once AI has made its move
           
@@ -232,15 +229,19 @@ def single_player_game(color, theme, depth):
       if event.type == pygame.QUIT:
         running = False
 
+      # the window was uncovered, so the parts that didn't change have to be drawn again too
+      if event.type == pygame.VIDEOEXPOSE:
+        chess_game.view.invalidate()
+
       if event.type == pygame.MOUSEBUTTONDOWN:
         mouse_xy = pygame.mouse.get_pos()
         row, col = calc_mouse_pos(mouse_xy)
         if chess_game.game_over():
           if 1 <= row <= 3 and 3 <= col <= 4:
             if color == "White":
-              single_player_game("Black", chess_game.theme, depth)
+              single_player_game("Black", chess_game.theme, depth, time_budget)
             else:
-              single_player_game("White", chess_game.theme, depth)
+              single_player_game("White", chess_game.theme, depth, time_budget)
           elif 4 <= row <= 5 and 3 <= col <= 4:
             running = False
         else:
@@ -251,8 +252,12 @@ def single_player_game(color, theme, depth):
         ai_thinking = True
         threading.Thread(target=multithread_minimax).start()
 
-    # If AI is thinking, freeze the screen
+    # If AI is thinking, freeze the screen. When visualizing, draw the newest position it published instead: the
+    # search thread never draws, so it only pays for the snapshots.
     if ai_thinking:
+      snapshot = chess_game.search_snapshots.latest()
+      if snapshot is not None:
+        chess_game.view.draw_snapshot(chess_game, snapshot)
       continue
     
     if chess_game.game_over():
@@ -276,6 +281,8 @@ def draw_end_screen(chess_game, game_window):
       main_text = my_font.render("Stalemate. White has no moves.", True, [0, 0, 0])
   elif chess_game.threefold_draw:
     main_text = my_font.render("Draw by threefold repetition.", True, [0, 0, 0])
+  elif chess_game.no_captures_50:
+    main_text = my_font.render("Draw by the fifty move rule.", True, [0, 0, 0])
   elif chess_game.resign:
     main_text = my_font.render(chess_game.turn + " has resigned the game.", True, [0, 0, 0])
   else:
@@ -298,7 +305,7 @@ def draw_end_screen(chess_game, game_window):
   quit_text = my_font.render("Quit", True, [0, 0, 0])
   game_window.blit(quit_text, (285, 235))
 
-  pygame.display.update()
+  pygame.display.update((85, 160, 310, 160))
 
 
 if __name__ == "__main__":
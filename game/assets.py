@@ -0,0 +1,40 @@
+import pygame
+from game.constants import square_size
+
+# Images and fonts are loaded the first time they are drawn, so the engine can run without them
+
+piece_images = {}
+theme_images = []
+fonts = {}
+
+
+def get_piece_image(piece_type, color, size=None):
+  """
+  Returns the image of a piece type ("Pawn", "Knight"...) of a color ("White" or "Black"), scaled to size if given.
+  """
+  key = (piece_type, color, size)
+  image = piece_images.get(key)
+  if image is None:
+    if size is None:
+      image = pygame.image.load(f"pieces/assets/{color}_{piece_type}.png")
+    else:
+      image = pygame.transform.scale(get_piece_image(piece_type, color), (size, size))
+    piece_images[key] = image
+  return image
+
+
+def get_theme_images():
+  # The background images of the blue, purple and red themes
+  if not theme_images:
+    for theme in ("blue", "purple", "red"):
+      image = pygame.image.load(f"game/themes/{theme}_theme.png")
+      theme_images.append(pygame.transform.scale(image, (square_size, square_size)))
+  return theme_images
+
+
+def get_font(size):
+  font = fonts.get(size)
+  if font is None:
+    pygame.font.init()
+    font = fonts[size] = pygame.font.SysFont("calibri", size)
+  return font
@@ -0,0 +1,129 @@
+# Precomputed attack tables for the bitboard move generator.
+# Squares are numbered like in game.position: 0 (a8) to 63 (h1), square = row * 8 + col.
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL_BOARD ^ FILE_A
+NOT_FILE_H = FULL_BOARD ^ FILE_H
+NOT_FILE_AB = FULL_BOARD ^ (FILE_A | FILE_B)
+NOT_FILE_GH = FULL_BOARD ^ (FILE_G | FILE_H)
+
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _knight_attacks(bitboard):
+  return (((bitboard >> 17) & NOT_FILE_H) | ((bitboard >> 15) & NOT_FILE_A) |
+          ((bitboard >> 10) & NOT_FILE_GH) | ((bitboard >> 6) & NOT_FILE_AB) |
+          ((bitboard << 6) & NOT_FILE_GH) | ((bitboard << 10) & NOT_FILE_AB) |
+          ((bitboard << 15) & NOT_FILE_H) | ((bitboard << 17) & NOT_FILE_A)) & FULL_BOARD
+
+
+def _king_attacks(bitboard):
+  sideways = ((bitboard >> 1) & NOT_FILE_H) | ((bitboard << 1) & NOT_FILE_A)
+  row = bitboard | sideways
+  return (sideways | (row >> 8) | (row << 8)) & FULL_BOARD
+
+
+def _pawn_attacks(bitboard, color):
+  # White pawns move towards row 0 and Black pawns towards row 7
+  if color == 0:
+    return ((bitboard >> 9) & NOT_FILE_H) | ((bitboard >> 7) & NOT_FILE_A)
+  return (((bitboard << 7) & NOT_FILE_H) | ((bitboard << 9) & NOT_FILE_A)) & FULL_BOARD
+
+
+def _sliding_attacks(square, occupied, directions):
+  attacks = 0
+  for row_step, col_step in directions:
+    row, col = divmod(square, 8)
+    while True:
+      row += row_step
+      col += col_step
+      if not (0 <= row < 8 and 0 <= col < 8):
+        break
+
+      bit = 1 << (row * 8 + col)
+      attacks |= bit
+      if occupied & bit:
+        break
+
+  return attacks
+
+
+def _blocker_mask(square, directions):
+  """
+  The squares that can block a sliding piece. The last square of every ray is left out,
+  since a piece there doesn't change which squares are attacked.
+  """
+  mask = 0
+  for row_step, col_step in directions:
+    row, col = divmod(square, 8)
+    while 0 <= row + 2 * row_step < 8 and 0 <= col + 2 * col_step < 8:
+      row += row_step
+      col += col_step
+      mask |= 1 << (row * 8 + col)
+  return mask
+
+
+KNIGHT_ATTACKS = [_knight_attacks(1 << square) for square in range(64)]
+KING_ATTACKS = [_king_attacks(1 << square) for square in range(64)]
+PAWN_ATTACKS = ([_pawn_attacks(1 << square, 0) for square in range(64)],
+                [_pawn_attacks(1 << square, 1) for square in range(64)])
+
+ROOK_MASKS = [_blocker_mask(square, ROOK_DIRECTIONS) for square in range(64)]
+BISHOP_MASKS = [_blocker_mask(square, BISHOP_DIRECTIONS) for square in range(64)]
+
+# Sliding attacks for every square, indexed by the occupancy of the blocker mask. Python dicts hash the
+# occupancy directly, so they do the job of magic bitboards without the magic multiplication. There are
+# about 100,000 possible occupancies, so the tables are filled on first use instead of at import.
+ROOK_ATTACKS = [{} for _ in range(64)]
+BISHOP_ATTACKS = [{} for _ in range(64)]
+
+
+def rook_attacks(square, occupied):
+  occupancy = occupied & ROOK_MASKS[square]
+  attacks = ROOK_ATTACKS[square].get(occupancy)
+  if attacks is None:
+    attacks = ROOK_ATTACKS[square][occupancy] = _sliding_attacks(square, occupancy, ROOK_DIRECTIONS)
+  return attacks
+
+
+def bishop_attacks(square, occupied):
+  occupancy = occupied & BISHOP_MASKS[square]
+  attacks = BISHOP_ATTACKS[square].get(occupancy)
+  if attacks is None:
+    attacks = BISHOP_ATTACKS[square][occupancy] = _sliding_attacks(square, occupancy, BISHOP_DIRECTIONS)
+  return attacks
+
+
+def queen_attacks(square, occupied):
+  return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+def _line_tables():
+  """
+  BETWEEN[a][b] holds the squares strictly between two squares on the same rank, file or diagonal,
+  and LINE[a][b] the whole line through both of them. Both are 0 for squares that aren't aligned.
+  """
+  between_table = [[0] * 64 for _ in range(64)]
+  line_table = [[0] * 64 for _ in range(64)]
+  for square in range(64):
+    for row_step, col_step in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+      line = (1 << square) | _sliding_attacks(square, 0, ((row_step, col_step), (-row_step, -col_step)))
+      between = 0
+      row, col = divmod(square, 8)
+      while 0 <= row + row_step < 8 and 0 <= col + col_step < 8:
+        row += row_step
+        col += col_step
+        target = row * 8 + col
+        between_table[square][target] = between
+        line_table[square][target] = line
+        between |= 1 << target
+
+  return between_table, line_table
+
+
+BETWEEN, LINE = _line_tables()
@@ -1,24 +1,33 @@
-import pygame
-from game.constants import square_size, num_rows, num_cols, light_gray, images
-from pieces.pawn import Pawn, pawns
-from pieces.knight import Knight, knights
-from pieces.bishop import Bishop, bishops
-from pieces.rook import Rook, rooks
-from pieces.queen import Queen, queens
-from pieces.king import King, kings
+from pieces.pawn import Pawn
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.rook import Rook
+from pieces.queen import Queen
+from pieces.king import King
+from pieces.piece import COLOR_NAMES
 from game.material import Material
+from game.zobrist import zobrist_hashing, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from game.attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, queen_attacks
 
-pygame.font.init()
 
+class StoredMove(object):
+  """
+  Everything undo_move needs to take back a simulated move. The board keeps one per ply and reuses them.
+  """
+  __slots__ = ("piece", "from_square", "to_square", "captured", "can_castle", "en_passant", "hash",
+               "rook", "rook_from", "promoted")
 
-PIECE_IMAGES = {
-    "Pawn": (pawns[0], pawns[1]),
-    "Knight": (knights[0], knights[1]),
-    "Bishop": (bishops[0], bishops[1]),
-    "Rook": (rooks[0], rooks[1]),
-    "Queen": (queens[0], queens[1]),
-    "King": (kings[0], kings[1])
-}
+  def __init__(self):
+    self.piece = None
+    self.from_square = None
+    self.to_square = None
+    self.captured = 0
+    self.can_castle = None
+    self.en_passant = None
+    self.hash = None
+    self.rook = None
+    self.rook_from = None
+    self.promoted = False
 
 
 class Board(object):
@@ -30,12 +39,19 @@ class Board(object):
     self.show_AI_calculations = False
     self.AI_speed = "Fast"
     self.stored_moves = []
+    self.ply = 0
     self.previous_move = None
     self.prev_square = None
     self.piece = None
     self.target = None
     self.captured_piece = 0
+    self.en_passant_pawn = None
     self.hash = None
+    self.attack_maps = None
+
+    # Moves since the last capture or pawn move, and the number of the current move (starting at 1, counting both players)
+    self.halfmove_clock = 0
+    self.fullmove_number = 1
     self.board = [
         [0, 0, 0, 0, 0, 0, 0, 0],
         [0, 0, 0, 0, 0, 0, 0, 0],
@@ -47,13 +63,103 @@ class Board(object):
         [0, 0, 0, 0, 0, 0, 0, 0]
     ]
 
+  @classmethod
+  def from_fen(cls, fen, player_color="White"):
+    """
+    Creates a board from a FEN string, with player_color at the bottom. Returns the board and the color to move.
+    Raises ValueError if the FEN is invalid.
+    """
+    # imported here because game.position imports this module
+    from game.position import Position
+    position = Position.from_fen(fen)
+    return position.to_board(player_color), COLOR_NAMES[position.side]
+
+  def to_fen(self, turn):
+    from game.position import Position
+    return Position.from_board(self, turn, self.halfmove_clock, self.fullmove_number).to_fen()
+
+  def update_clocks(self, turn, reset_halfmove_clock):
+    """
+    Counts a move by turn. A capture or pawn move resets the halfmove clock, and a move by Black completes a full move.
+    """
+    self.halfmove_clock = 0 if reset_halfmove_clock else self.halfmove_clock + 1
+    if turn == "Black":
+      self.fullmove_number += 1
+
   def move(self, piece, row, col):
     self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
     piece.move(row, col)
+    self.attack_maps = None
+
+  def push_stored_move(self):
+    # records are only created the first time a ply is reached
+    if self.ply == len(self.stored_moves):
+      self.stored_moves.append(StoredMove())
+    stored_move = self.stored_moves[self.ply]
+    self.ply += 1
+    return stored_move
+
+  def pop_stored_move(self):
+    self.ply -= 1
+    return self.stored_moves[self.ply]
 
   def get_piece(self, row, col):
     return self.board[row][col]
 
+  def set_piece(self, row, col, piece):
+    self.board[row][col] = piece
+    self.attack_maps = None
+
+  def get_king(self, color):
+    for row in self.board:
+      for piece in row:
+        if isinstance(piece, King) and piece.color == color:
+          return piece
+    return None
+
+  def get_attack_map(self, color):
+    """
+    Returns a bitmask of the squares attacked by the given color, where bit row * 8 + col is set for every attacked square.
+    The maps of both colors are calculated together and cached until a piece is moved or placed on the board.
+    """
+    if self.attack_maps is None:
+      self.attack_maps = self.calculate_attack_maps()
+    return self.attack_maps[color]
+
+  def is_attacked(self, row, col, color):
+    return self.get_attack_map(color) >> (row * 8 + col) & 1 == 1
+
+  def calculate_attack_maps(self):
+    occupied = 0
+    for row in self.board:
+      for piece in row:
+        if piece != 0:
+          occupied |= 1 << (piece.row * 8 + piece.col)
+
+    attack_maps = {"White": 0, "Black": 0}
+    for row in self.board:
+      for piece in row:
+        if piece == 0:
+          continue
+
+        square = piece.row * 8 + piece.col
+        if isinstance(piece, Pawn):
+          # the attack tables are laid out for pawns moving up as White and down as Black
+          attacks = PAWN_ATTACKS[0 if piece.direction == "Up" else 1][square]
+        elif isinstance(piece, Knight):
+          attacks = KNIGHT_ATTACKS[square]
+        elif isinstance(piece, Bishop):
+          attacks = bishop_attacks(square, occupied)
+        elif isinstance(piece, Rook):
+          attacks = rook_attacks(square, occupied)
+        elif isinstance(piece, Queen):
+          attacks = queen_attacks(square, occupied)
+        else:
+          attacks = KING_ATTACKS[square]
+        attack_maps[piece.color] |= attacks
+
+    return attack_maps
+
   def initiate_pieces(self):
     if self.player_color == "White":
       # Place Black pieces on top row (row 0 to 1)
@@ -105,139 +211,55 @@ class Board(object):
       ]
 
     for piece in pieces:
-      self.board[piece.row][piece.col] = piece
-
-  def create_board(self, window, theme):
-    my_font = pygame.font.SysFont("calibri", 15)
-    letters = ["a", "b", "c", "d", "e", "f", "g", "h"]
-
-    # Draw squares and background
-    window.fill(theme[0])
-    for row in range(num_rows):
-      for col in range(num_cols):
-        if (row + col) % 2 == 0:
-          pygame.draw.rect(
-            window, theme[1], (row * square_size, col * square_size, square_size, square_size))
-
-    # Draw board letters and numbers
-    for i in range(0, 8):
-      text = my_font.render(letters[i], True, (0, 0, 0))
-      window.blit(text, (square_size * i + 2,
-                  square_size * 7 + square_size - 20))
-
-      text = my_font.render(str(8 - i), True, (0, 0, 0))
-      window.blit(text, (square_size * 0 + 2, square_size * i + 5))
-
-    # Draw move history
-    pygame.draw.rect(window, (255, 255, 255), (10, 490, 700, 140))
-
-  def draw(self, window, board):
-    for row in board.board:
+      self.set_piece(piece.row, piece.col, piece)
+
+    self.update_hash("White")
+
+  def get_square(self, row, col):
+    """
+    Returns the square as seen from White's side of the board, which is how positions are keyed.
+    """
+    if self.player_color == "White":
+      return row, col
+    return 7 - row, col
+
+  def get_castling_rights(self):
+    rights = 0
+    white_row, black_row = (7, 0) if self.player_color == "White" else (0, 7)
+
+    for color, row, kingside, queenside in (("White", white_row, WHITE_KINGSIDE, WHITE_QUEENSIDE),
+                                            ("Black", black_row, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+      king = self.board[row][4]
+      if not (isinstance(king, King) and king.color == color and king.can_castle):
+        continue
+
+      for col, right in ((7, kingside), (0, queenside)):
+        rook = self.board[row][col]
+        if isinstance(rook, Rook) and rook.color == color and rook.can_castle:
+          rights |= right
+
+    return rights
+
+  def get_en_passant_file(self):
+    if self.en_passant_pawn is None:
+      return None
+    return self.en_passant_pawn.col
+
+  def update_en_passant(self, turn):
+    """
+    A pawn can only be captured en passant right after it moved, so clear the flags of the player to move.
+    """
+    self.en_passant_pawn = None
+    for row in self.board:
       for piece in row:
-        if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen, King)):
-          piece_image = PIECE_IMAGES[type(piece).__name__]
-          image = piece_image[0] if piece.color == "White" else piece_image[1]
-          piece.draw(window, image)
-
-  def promotion_menu(self, color, window):
-    if color == "White":
-      self.draw_promotion_window(
-        queens[0], rooks[0], bishops[0], knights[0], window)
-    else:
-      self.draw_promotion_window(
-        queens[1], rooks[1], bishops[1], knights[1], window)
-
-  def draw_promotion_window(self, queen, rook, bishop, knight, window):
-    for i, piece in enumerate([queen, rook, bishop, knight]):
-      pygame.draw.rect(window, light_gray, (540 + i % 2 * square_size,
-                                            180 + i // 2 * square_size, square_size, square_size))
-      window.blit(piece, (540 + i % 2 * square_size,
-                          180 + i // 2 * square_size))
-
-  def draw_theme_window(self, window):
-    # Blue
-    window.blit(images[0], (500, 115))
-
-    # Purple
-    window.blit(images[1], (570, 115))
-
-    # Red
-    window.blit(images[2], (640, 115))
-
-  def draw_game_buttons(self, window, theme, ai):
-      my_font = pygame.font.SysFont("calibri", 12)
-      
-      # Resign Button
-      new_game = my_font.render("Resign/Quit", True, (0, 0, 0))
-      pygame.draw.rect(window, [0, 0, 0], (483, 198, 74, 39))
-      pygame.draw.rect(window, [255, 255, 255], (485, 200, 70, 35))
-      window.blit(new_game, (488, 210))
-
-      # Visualize AI Button
-      show_thinking = my_font.render("Visualize AI", True, (0, 0, 0))
-      pygame.draw.rect(window, [0, 0, 0], (563, 198, 74, 39))
-      if self.show_AI_calculations:
-          pygame.draw.rect(window, theme[1], (565, 200, 70, 35))
-      else:
-          pygame.draw.rect(window, [255, 255, 255], (565, 200, 70, 35))
-      window.blit(show_thinking, (568, 210))
-
-      # Visualize AI Speed Button
-      speed = my_font.render(self.AI_speed, True, (0, 0, 0))
-      pygame.draw.rect(window, [0, 0, 0], (563, 243, 74, 39))
-      if self.show_AI_calculations:
-          pygame.draw.rect(window, theme[1], (565, 245, 70, 35))
-      else:
-          pygame.draw.rect(window, [255, 255, 255], (565, 245, 70, 35))
-
-      if self.AI_speed == "Medium":
-          window.blit(speed, (579, 255))
-      else:
-          window.blit(speed, (588, 255))
-
-      # Highlight Valid Moves
-      show_valid_moves1 = my_font.render("Highlight", True, (0, 0, 0))
-      show_valid_moves2 = my_font.render("Valid Moves", True, (0, 0, 0))
-      pygame.draw.rect(window, [0, 0, 0], (643, 198, 74, 39))
-      if self.show_valid_moves:
-          pygame.draw.rect(window, theme[1], (645, 200, 70, 35))
-      else:
-          pygame.draw.rect(window, [255, 255, 255], (645, 200, 70, 35))
-      window.blit(show_valid_moves1, (655, 203))
-      window.blit(show_valid_moves2, (648, 217))
-      
-      if not ai:
-        return
-      
-      pruned_percentage = "N/A"
-      if ai.moves_evaluated and ai.total_moves_found:
-        pruned_percentage = str(round(100 - (ai.moves_evaluated / max(1, ai.total_moves_found)) * 100, 2)) + "%"
-      
-      # Display AI evaluation stats
-      moves_evaluated_text = my_font.render(f"Moves Evaluated: {ai.moves_evaluated}", True, (0, 0, 0))
-      total_moves_found_text = my_font.render(f"Total Moves Found: {ai.total_moves_found}", True, (0, 0, 0))      
-      pruned_percentage_text = my_font.render(f"% of Search Tree Pruned: {pruned_percentage}", True, (0, 0, 0))
-      current_best_evaluation_text = my_font.render(f"Current Best Evaluation: {round(ai.current_best_evaluation / 100, 2)}", True, (0, 0, 0))
-      
-      window.blit(moves_evaluated_text, (500, 310))
-      window.blit(total_moves_found_text, (500, 330))
-      window.blit(pruned_percentage_text, (500, 350))
-      window.blit(current_best_evaluation_text, (500, 370))
-
-  def draw_valid_moves(self, moves, window):
-    for move in moves:
-      row, col = move
-      self.draw_move_square(col, row, [128, 5, 242], window)
-
-  def draw_previous_move(self, window):
-    if self.previous_move is not None:
-      for move in self.previous_move:
-        row, col = move
-        self.draw_move_square(col, row, [21, 35, 230], window)
-
-  def draw_move_square(self, row, col, color, window):
-    pygame.draw.rect(window, color, (row * square_size, col *
-                     square_size, square_size + 1, square_size + 1), 2)
+        if isinstance(piece, Pawn) and piece.vulnerable_to_en_passant:
+          if piece.color == turn:
+            piece.vulnerable_to_en_passant = False
+          else:
+            self.en_passant_pawn = piece
+
+  def update_hash(self, turn):
+    self.hash = zobrist_hashing.calculate_hash(self, turn)
 
   def get_all_pieces(self, color):
     pieces = []
@@ -0,0 +1,355 @@
+import pygame
+from game.constants import square_size, num_rows, num_cols, light_gray, themes
+from game.assets import get_piece_image, get_theme_images, get_font
+from game.position import EMPTY, move_from, move_to, move_name
+from pieces.piece import COLOR_NAMES, PIECE_NAMES
+from pieces.pawn import Pawn
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.rook import Rook
+from pieces.queen import Queen
+
+# Square outlines, from the lowest priority to the highest when a square has more than one
+PREVIOUS_MOVE_COLOR = (21, 35, 230)
+VALID_MOVE_COLOR = (128, 5, 242)
+BEST_MOVE_COLOR = (20, 160, 60)
+
+# The panels around the board that are redrawn separately
+BUTTONS_RECT = pygame.Rect(480, 195, 240, 90)
+STATS_RECT = pygame.Rect(495, 305, 225, 100)
+MOVE_LOG_RECT = pygame.Rect(10, 490, 700, 140)
+CAPTURED_RECTS = (pygame.Rect(480, 20, 240, 92), pygame.Rect(480, 405, 240, 82))
+PROMOTION_RECT = pygame.Rect(540, 180, 2 * square_size, 2 * square_size)
+
+
+class BoardView(object):
+  """
+  Draws a game in a pygame window. This is the only part of a game that uses pygame, so the rules and the
+  search can run without a display.
+  Everything that never changes during a game (the squares, their labels and the theme buttons) is drawn once on a
+  background surface. Every frame only redraws the squares and panels that changed since the last one, and only those
+  parts of the window are sent to the display.
+  """
+
+  def __init__(self, window):
+    self.window = window
+    self.background = None
+    self.background_theme = None
+
+    # What every square and panel showed in the last frame, so unchanged ones are skipped
+    self.square_states = [[None] * num_cols for _ in range(num_rows)]
+    self.panel_states = {}
+    self.full_redraw = True
+
+  def invalidate(self):
+    # The next frame redraws the whole window, for when something else drew over it
+    self.full_redraw = True
+
+  def update_screen(self, game, valid_moves, board):
+    pieces = [[piece.color_code * 6 + piece.type_code if piece != 0 else EMPTY for piece in row] for row in board.board]
+    self.render(game, pieces, valid_moves, (), game.computer, None)
+
+  def draw_snapshot(self, game, snapshot):
+    """
+    Draws a position the computer is searching, from a SearchSnapshot that the search thread published: the move that
+    led to it, the best move found so far, the line of moves from the current position and the search statistics.
+    """
+    board = game.board
+    pieces = [[EMPTY] * num_cols for _ in range(num_rows)]
+    for square, piece in enumerate(snapshot.squares):
+      if piece != EMPTY:
+        row, col = board.get_square(*divmod(square, 8))
+        pieces[row][col] = piece
+
+    last_move = [board.get_square(*divmod(move_to(snapshot.line[-1]), 8))] if snapshot.line else []
+    best_move = ()
+    if snapshot.best_move is not None:
+      best_squares = (move_from(snapshot.best_move), move_to(snapshot.best_move))
+      best_move = [board.get_square(*divmod(square, 8)) for square in best_squares]
+    self.render(game, pieces, last_move, best_move, snapshot, snapshot.line)
+
+  def render(self, game, pieces, valid_moves, best_move, ai, line):
+    """
+    Draws a frame. pieces holds the piece index (color * 6 + type, or EMPTY) of every square as the board shows it,
+    and ai is where the search statistics come from (a Computer or a SearchSnapshot).
+    """
+    board = game.board
+    theme = themes[game.theme]
+    if self.background_theme != game.theme:
+      self.background = self.create_board(theme)
+      self.background_theme = game.theme
+      self.full_redraw = True
+
+    # the promotion menu covers parts of several panels, so opening or closing it redraws everything
+    promoting = game.human.promoting
+    if promoting != self.panel_states.get("promotion"):
+      self.full_redraw = True
+
+    if self.full_redraw:
+      self.window.blit(self.background, (0, 0))
+      self.square_states = [[None] * num_cols for _ in range(num_rows)]
+      self.panel_states = {"promotion": promoting}
+
+    dirty_rects = []
+    outlines = self.get_outlines(board, valid_moves, best_move)
+    for row in range(num_rows):
+      for col in range(num_cols):
+        state = (pieces[row][col], outlines.get((row, col)))
+        if state != self.square_states[row][col]:
+          self.square_states[row][col] = state
+          dirty_rects.append(self.draw_square(row, col, *state))
+
+    if self.panel_changed("buttons", (board.show_AI_calculations, board.AI_speed, board.show_valid_moves)):
+      self.clear(BUTTONS_RECT)
+      self.draw_game_buttons(board, theme)
+      dirty_rects.append(BUTTONS_RECT)
+
+    stats = None
+    if ai:
+      stats = (ai.moves_evaluated, ai.total_moves_found, ai.current_best_evaluation, tuple(line or ()))
+    if self.panel_changed("stats", stats):
+      self.clear(STATS_RECT)
+      if ai:
+        self.draw_search_stats(ai, line)
+      dirty_rects.append(STATS_RECT)
+
+    move_log = game.move_history.move_log
+    if self.panel_changed("move log", (len(move_log), move_log[-1] if move_log else None)):
+      self.clear(MOVE_LOG_RECT)
+      self.draw_move_log(move_log)
+      dirty_rects.append(MOVE_LOG_RECT)
+
+    material = board.material
+    if self.panel_changed("material", (tuple(piece.type_code for piece in material.captured_black_pieces),
+                                       tuple(piece.type_code for piece in material.captured_white_pieces),
+                                       material.white_advantage, material.black_advantage)):
+      for rect in CAPTURED_RECTS:
+        self.clear(rect)
+        dirty_rects.append(rect)
+      self.draw_captured(material, game.human.color)
+      self.draw_advantages(material, game.human.color)
+
+    if promoting and PROMOTION_RECT.collidelist(dirty_rects) != -1:
+      self.promotion_menu(game.human.color)
+      dirty_rects.append(PROMOTION_RECT)
+
+    if self.full_redraw:
+      self.full_redraw = False
+      pygame.display.update()
+    elif dirty_rects:
+      pygame.display.update(dirty_rects)
+
+  def panel_changed(self, name, state):
+    if name in self.panel_states and self.panel_states[name] == state:
+      return False
+    self.panel_states[name] = state
+    return True
+
+  def clear(self, rect):
+    self.window.blit(self.background, rect, rect)
+
+  def create_board(self, theme):
+    """
+    Returns the background of the window for a theme: the squares with their labels, the theme buttons and the
+    empty move log.
+    """
+    background = pygame.Surface(self.window.get_size())
+    my_font = get_font(15)
+    letters = ["a", "b", "c", "d", "e", "f", "g", "h"]
+
+    # Draw squares and background
+    background.fill(theme[0])
+    for row in range(num_rows):
+      for col in range(num_cols):
+        if (row + col) % 2 == 0:
+          pygame.draw.rect(
+            background, theme[1], (row * square_size, col * square_size, square_size, square_size))
+
+    # Draw board letters and numbers
+    for i in range(0, 8):
+      text = my_font.render(letters[i], True, (0, 0, 0))
+      background.blit(text, (square_size * i + 2,
+                      square_size * 7 + square_size - 20))
+
+      text = my_font.render(str(8 - i), True, (0, 0, 0))
+      background.blit(text, (square_size * 0 + 2, square_size * i + 5))
+
+    # Draw change theme buttons (blue, purple and red)
+    for image, x in zip(get_theme_images(), (500, 570, 640)):
+      background.blit(image, (x, 115))
+
+    # Draw move history
+    pygame.draw.rect(background, (255, 255, 255), MOVE_LOG_RECT)
+    return background
+
+  def get_outlines(self, board, valid_moves, best_move):
+    # The outline color of every highlighted (row, col) square
+    outlines = {}
+    if board.previous_move is not None:
+      for square in board.previous_move:
+        outlines[tuple(square)] = PREVIOUS_MOVE_COLOR
+    if board.show_valid_moves:
+      for square in valid_moves:
+        outlines[tuple(square)] = VALID_MOVE_COLOR
+    for square in best_move:
+      outlines[tuple(square)] = BEST_MOVE_COLOR
+    return outlines
+
+  def draw_square(self, row, col, piece, outline):
+    rect = pygame.Rect(col * square_size, row * square_size, square_size, square_size)
+    self.clear(rect)
+    if outline is not None:
+      pygame.draw.rect(self.window, outline, rect, 2)
+    if piece != EMPTY:
+      self.window.blit(get_piece_image(PIECE_NAMES[piece % 6], COLOR_NAMES[piece // 6]), rect)
+    return rect
+
+  def promotion_menu(self, color):
+    for i, piece_type in enumerate(["Queen", "Rook", "Bishop", "Knight"]):
+      pygame.draw.rect(self.window, light_gray, (540 + i % 2 * square_size,
+                                                 180 + i // 2 * square_size, square_size, square_size))
+      self.window.blit(get_piece_image(piece_type, color), (540 + i % 2 * square_size,
+                                                            180 + i // 2 * square_size))
+
+  def draw_game_buttons(self, board, theme):
+    window = self.window
+    my_font = get_font(12)
+
+    # Resign Button
+    new_game = my_font.render("Resign/Quit", True, (0, 0, 0))
+    pygame.draw.rect(window, [0, 0, 0], (483, 198, 74, 39))
+    pygame.draw.rect(window, [255, 255, 255], (485, 200, 70, 35))
+    window.blit(new_game, (488, 210))
+
+    # Visualize AI Button
+    show_thinking = my_font.render("Visualize AI", True, (0, 0, 0))
+    pygame.draw.rect(window, [0, 0, 0], (563, 198, 74, 39))
+    if board.show_AI_calculations:
+      pygame.draw.rect(window, theme[1], (565, 200, 70, 35))
+    else:
+      pygame.draw.rect(window, [255, 255, 255], (565, 200, 70, 35))
+    window.blit(show_thinking, (568, 210))
+
+    # Visualize AI Speed Button
+    speed = my_font.render(board.AI_speed, True, (0, 0, 0))
+    pygame.draw.rect(window, [0, 0, 0], (563, 243, 74, 39))
+    if board.show_AI_calculations:
+      pygame.draw.rect(window, theme[1], (565, 245, 70, 35))
+    else:
+      pygame.draw.rect(window, [255, 255, 255], (565, 245, 70, 35))
+
+    if board.AI_speed == "Medium":
+      window.blit(speed, (579, 255))
+    else:
+      window.blit(speed, (588, 255))
+
+    # Highlight Valid Moves
+    show_valid_moves1 = my_font.render("Highlight", True, (0, 0, 0))
+    show_valid_moves2 = my_font.render("Valid Moves", True, (0, 0, 0))
+    pygame.draw.rect(window, [0, 0, 0], (643, 198, 74, 39))
+    if board.show_valid_moves:
+      pygame.draw.rect(window, theme[1], (645, 200, 70, 35))
+    else:
+      pygame.draw.rect(window, [255, 255, 255], (645, 200, 70, 35))
+    window.blit(show_valid_moves1, (655, 203))
+    window.blit(show_valid_moves2, (648, 217))
+
+  def draw_search_stats(self, ai, line=None):
+    window = self.window
+    my_font = get_font(12)
+
+    pruned_percentage = "N/A"
+    if ai.moves_evaluated and ai.total_moves_found:
+      pruned_percentage = str(round(100 - (ai.moves_evaluated / max(1, ai.total_moves_found)) * 100, 2)) + "%"
+
+    # Display AI evaluation stats
+    moves_evaluated_text = my_font.render(f"Moves Evaluated: {ai.moves_evaluated}", True, (0, 0, 0))
+    total_moves_found_text = my_font.render(f"Total Moves Found: {ai.total_moves_found}", True, (0, 0, 0))
+    pruned_percentage_text = my_font.render(f"% of Search Tree Pruned: {pruned_percentage}", True, (0, 0, 0))
+    current_best_evaluation_text = my_font.render(f"Current Best Evaluation: {round(ai.current_best_evaluation / 100, 2)}", True, (0, 0, 0))
+
+    window.blit(moves_evaluated_text, (500, 310))
+    window.blit(total_moves_found_text, (500, 330))
+    window.blit(pruned_percentage_text, (500, 350))
+    window.blit(current_best_evaluation_text, (500, 370))
+
+    # Display the line of moves the search is looking at
+    if line:
+      text = " ".join(move_name(move) for move in line[:5])
+      if len(line) > 5:
+        text += " ..."
+      window.blit(my_font.render(f"Line: {text}", True, (0, 0, 0)), (500, 390))
+
+  def draw_move_log(self, move_log):
+    # Draw First 50 Moves
+    if 0 <= len(move_log) < 50:
+      self.show_move_log(move_log, 0)
+
+    # Draw next 50
+    elif 50 <= len(move_log) < 100:
+      self.show_move_log(move_log, 50)
+
+    # Draw next 50
+    elif 100 <= len(move_log) < 150:
+      self.show_move_log(move_log, 100)
+
+  def show_move_log(self, move_log, start):
+    my_font = get_font(15)
+    move_list = []
+    move_string = []
+    text = my_font.render("".join(move_string), True, (0, 0, 0))
+
+    for i in range(start, len(move_log)):
+      move = str(i + 1) + "." + move_log[i] + ", "
+      move_string.append(move)
+      text = my_font.render("".join(move_string), True, (0, 0, 0))
+
+      # Every 11th move added to move string, append it to move list
+      if i != 0 and i % 11 == 0:
+        move_list.append("".join(move_string))
+        move_string = []
+        text = my_font.render("".join(move_string), True, (0, 0, 0))
+
+    if len(move_list) == 0:
+      self.window.blit(text, (10, 490))
+
+    elif len(move_list) > 0:
+      for move_ind in range(len(move_list)):
+        list_text = my_font.render(move_list[move_ind], True, (0, 0, 0))
+        self.window.blit(list_text, (10, 490 + 20 * move_ind))
+
+      self.window.blit(text, (10, 490 + 20 * len(move_list)))
+
+  def draw_captured(self, material, color):
+    positions = {
+      "White": [(480, 410, 25, 0), (480, 435, 25, -8)],
+      "Black": [(480, 35, 25, 0), (480, 55, 25, -8)]
+    }
+    for idx, piece in enumerate(material.captured_black_pieces):
+      image = get_piece_image(piece.type, "Black", 32)
+      x_offset, y_base, spacing, shift = positions[color][0 if idx < 8 else 1]
+      self.window.blit(image, (x_offset + (idx + shift) * spacing, y_base))
+
+    for idx, piece in enumerate(material.captured_white_pieces):
+      image = get_piece_image(piece.type, "White", 32)
+      x_offset, y_base, spacing, shift = positions[color][0 if idx < 8 else 1]
+      self.window.blit(image, (x_offset + (idx + shift) * spacing,
+                       y_base - 385 if color == "White" else y_base + 375))
+
+  def draw_advantages(self, material, color):
+    def draw_text(pieces_list, advantage, y_offsets):
+      text = get_font(15).render(f"+{advantage}", True, (0, 0, 0))
+      pieces_list.append(text)
+      for piece in range(len(pieces_list)):
+        if not isinstance(pieces_list[piece], (Pawn, Knight, Bishop, Rook, Queen)):
+          x_offset = 460 + (piece + 1) * 25
+          y_offset = y_offsets[0] if piece <= 8 else y_offsets[1]
+          self.window.blit(pieces_list[piece], (x_offset, y_offset))
+          pieces_list.pop(-1)
+
+    if material.white_advantage > material.black_advantage:
+      draw_text(material.captured_black_pieces, material.white_advantage,
+                (420 if color == "White" else 45, 445 if color == "White" else 70))
+    elif material.black_advantage > material.white_advantage:
+      draw_text(material.captured_white_pieces, material.black_advantage,
+                (35 if color == "White" else 410, 60 if color == "White" else 435))
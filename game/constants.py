@@ -1,4 +1,3 @@
-import pygame
 
 # The width and height of the window
 width, height = 720, 640
@@ -18,16 +17,17 @@ themes = [blue_theme, purple_theme, red_theme]
 # Used for promotion menu
 light_gray = (230, 230, 230)
 
-# The background images
-blue_image = pygame.transform.scale(pygame.image.load("game/themes/blue_theme.png"), (square_size, square_size))
-purple_image = pygame.transform.scale(pygame.image.load("game/themes/purple_theme.png"), (square_size, square_size))
-red_image = pygame.transform.scale(pygame.image.load("game/themes/red_theme.png"), (square_size, square_size))
-images = [blue_image, purple_image, red_image]
+# AI difficulties as (name, maximum search depth, time budget per move in milliseconds)
+difficulties = [
+    ("Easy", 2, 1000),
+    ("Medium", 3, 2000),
+    ("Hard", 4, 3000),
+    ("Veteran", 5, 5000),
+    ("Expert", 6, 10000)
+]
 
 function_names = [
-    "evaluate_board",
     "get_all_moves",
-    "order_moves",
     "simulate_move",
     "undo_move"
 ]
\ No newline at end of file
@@ -1,27 +1,39 @@
-import pygame
 from game.board import Board
+from game.position import Position, FIFTY_MOVE_PLIES
 from pieces.pawn import Pawn
-from pieces.knight import Knight
-from pieces.bishop import Bishop
-from pieces.rook import Rook
-from pieces.queen import Queen
 from pieces.king import King
 from game.move_history import MoveHistory
-from game.constants import themes
+from game.game_status import GameStatus
+from game.snapshots import SnapshotChannel
 from players.human_player import Human
 from players.computer_player import Computer
 
 
 class Game(object):
-  def __init__(self, window, player_color, theme):
-    self.window = window
+  def __init__(self, view, player_color, theme):
+    # The BoardView that draws the game, or None to play without a display
+    self.view = view
+
+    # Positions the computer is searching, published by the search thread for the game window to draw
+    self.search_snapshots = SnapshotChannel()
     self.theme = theme
     self.move_history = MoveHistory()
     self.human = Human(player_color, self)
     self.board = Board(player_color)
+    self.board.initiate_pieces()
     self.computer = Computer("Black" if player_color == "White" else "White")
     self.turn = "White"
 
+    # The hashes of the positions since the last capture or pawn move, ending with the current one, and how often each
+    # occurred, so a threefold repetition is found without looking through the game
+    self.position_keys = [self.board.hash]
+    self.position_counts = {self.board.hash: 1}
+
+    # Piece counts, legal moves and check for the game over checks, updated after every move
+    self.status = GameStatus()
+    self.status.count_pieces(self.board)
+    self.status.update(self.get_position())
+
     # Game Over Conditions
     self.checkmate_win = False
     self.stalemate_draw = False
@@ -35,193 +47,100 @@ class Game(object):
                 self.no_captures_50, self.insufficient_material_draw, self.resign])
 
   def update_screen(self, valid_moves, board):
-    # Draw Board
-    self.board.create_board(self.window, themes[self.theme])
-
-    # Draw Previous Move
-    self.board.draw_previous_move(self.window)
-
-    # Draw all valid moves for selected piece
-    if self.board.show_valid_moves:
-      self.board.draw_valid_moves(valid_moves, self.window)
-
-    # Draw change theme buttons
-    self.board.draw_theme_window(self.window)
-
-    # Draw Game Buttons
-    self.board.draw_game_buttons(self.window, themes[self.theme], self.computer)
-
-    # Draw Move Log
-    self.move_history.draw_move_log(self.window)
-
-    # Draw captured and advantages
-    self.board.material.draw_captured(self.window, self.human.color)
-    self.board.material.draw_advantages(self.window, self.human.color)
-
-    # Draw the chess pieces
-    self.board.draw(self.window, board)
-
-    # Draw Promotion Menu
-    if self.human.promoting:
-      self.board.promotion_menu(self.human.color, self.window)
-
-    # Update the screen
-    pygame.display.update()
+    if self.view is not None:
+      self.view.update_screen(self, valid_moves, board)
 
-  def update_game(self):
-    self.board.material.update_advantages(self.board)
+  def update_game(self, reset_halfmove_clock=False):
+    self.board.update_clocks(self.turn, reset_halfmove_clock)
     self.change_turn()
-    self.update_all_valid_moves()
+    self.board.update_en_passant(self.turn)
+    self.board.update_hash(self.turn)
+    # a pawn waiting to be promoted isn't a position yet, so it is recorded and checked once the piece is chosen
+    if not self.human.promoting:
+      self.record_position(reset_halfmove_clock)
+      self.update_status()
+
+  def update_status(self):
+    # A single legal move generation for the player to move tells whether the game is over. The valid moves of the
+    # pieces are only needed for the piece the player selects, so they are updated then (see update_valid_moves).
+    self.status.update(self.get_position())
+    self.board.material.update_advantages(self.status)
+    self.board.get_king(self.turn).is_checked = self.status.in_check
+
+  def record_position(self, irreversible):
+    # Positions before a capture or a pawn move can never occur again
+    if irreversible:
+      self.position_keys.clear()
+      self.position_counts.clear()
+    key = self.board.hash
+    self.position_keys.append(key)
+    self.position_counts[key] = self.position_counts.get(key, 0) + 1
+
+  def get_position(self):
+    # The bitboard Position of the board for the computer to search, which knows the positions played before it
+    position = Position.from_board(self.board, self.turn, self.board.halfmove_clock, self.board.fullmove_number)
+    position.key_history = self.position_keys[:-1]
+    return position
 
   def check_game_status(self):
-    if self.king_checked():
-      self.checkmate()
+    self.checkmate()
     self.stalemate()
     self.threefold_repetition()
     self.insufficient_material()
     self.no_captures_in_50()
 
-  def update_all_valid_moves(self):
-    for row in self.board.board:
-      for piece in row:
-        if isinstance(piece, (Knight, Bishop, Rook, Queen, King)):
-          piece.update_valid_moves(self.board.board)
-        elif isinstance(piece, Pawn):
-          piece.update_valid_moves(
-            self.board.board, self.move_history.move_log)
-
-  def get_dangerous_squares(self):
-    dangerous_squares = []
-    for row in self.board.board:
-      for piece in row:
-        if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen, King)):
-          if piece.color != self.turn:
-            dangerous_squares.extend(piece.valid_moves)
-
-    return dangerous_squares
+  def update_valid_moves(self, piece):
+    piece.update_valid_moves(self.board.board)
+    if isinstance(piece, King):
+      self.filter_king_moves(piece)
 
-  def king_checked(self):
-    self.update_all_valid_moves()
-    king = None
-    dangerous_squares = self.get_dangerous_squares()
-    king_pos = (None, None)
-    for row in self.board.board:
-      for piece in row:
-        if isinstance(piece, King) and piece.color == self.turn:
-          king_pos = (piece.row, piece.col)
-          king = piece
-          break
-
-    if king_pos in dangerous_squares:
-      king.is_checked = True
-      return True
+  def filter_king_moves(self, king):
+    # A king can't move to a square that the enemy attacks. Castling moves onto the king's own rook, and castle() checks those squares
+    enemy = "Black" if king.color == "White" else "White"
+    king.valid_moves[:] = [move for move in king.valid_moves
+                           if (self.board.get_piece(*move) != 0 and self.board.get_piece(*move).color_code == king.color_code)
+                           or not self.board.is_attacked(move[0], move[1], enemy)]
+    return king.valid_moves
 
-    king.is_checked = False
-    return False
+  def king_checked(self):
+    king = self.board.get_king(self.turn)
+    enemy = "Black" if self.turn == "White" else "White"
+    king.is_checked = self.board.is_attacked(king.row, king.col, enemy)
+    return king.is_checked
 
   def checkmate(self):
-    for row in self.board.board:
-      for piece in row:
-
-        # Get all pieces that are the same color as the king in check
-        if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen, King)) and piece.color == self.turn:
-          prev_row, prev_col = piece.row, piece.col
-
-          # Try all the moves available for each piece to see if they can escape check
-          for move in piece.valid_moves:
-            target = self.board.board[move[0]][move[1]]
-
-            # If capturing an enemy piece
-            if isinstance(target, (Pawn, Knight, Bishop, Rook, Queen, King)) and target.color != self.turn:
-              self.board.board[move[0]][move[1]] = 0
-              self.board.move(piece, move[0], move[1])
-
-              # If king is still checked, undo move and go next
-              if self.king_checked():
-                self.board.move(piece, prev_row, prev_col)
-                self.board.board[move[0]][move[1]] = target
-
-              # If king is no longer checked, then there is no checkmate yet
-              else:
-                self.board.move(piece, prev_row, prev_col)
-                self.board.board[move[0]][move[1]] = target
-                return False
-
-            # If moving to an empty square
-            else:
-              self.board.move(piece, move[0], move[1])
-
-              # If king is still checked, undo move and go next
-              if self.king_checked():
-                self.board.move(piece, prev_row, prev_col)
-
-              # If king is no longer checked, then there is no checkmate yet
-              else:
-                self.board.move(piece, prev_row, prev_col)
-                return False
+    # The current player is checkmated if they are in check and have no legal moves
+    if not self.status.is_checkmate():
+      return False
 
     self.update_screen(self.human.valid_moves, self.board)
     self.checkmate_win = True
+    return True
 
   def threefold_repetition(self):
-    # Check for threefold repetition in the move history
-    unique_moves = set(self.move_history.move_log[-9:])
-    if len(self.move_history.move_log) > 9 and len(unique_moves) == 4:
+    # The position on the board is a draw if it occurred three times
+    if self.position_counts.get(self.board.hash, 0) >= 3:
       self.update_screen(self.human.valid_moves, self.board)
       self.threefold_draw = True
 
   def stalemate(self):
-    all_valid_moves = []
-    dangerous_squares = self.get_dangerous_squares()
-
-    for row in self.board.board:
-      for piece in row:
-        # Get all pieces that are the same color as the current player's team
-        if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen, King)) and piece.color == self.turn:
-
-          # Go through all possible moves to see if any are legal
-          if isinstance(piece, King):
-            for move in piece.valid_moves:
-              if move not in dangerous_squares:
-                all_valid_moves.append(move)
-          else:
-            for move in piece.valid_moves:
-              all_valid_moves.append(move)
-
-    # If there were no legal moves for the current player, its a stalemate
-    if not all_valid_moves:
-      self.update_screen(self.human.valid_moves, self.board)
-      self.stalemate_draw = True
+    # If the current player isn't in check but has no legal moves, its a stalemate
+    if not self.status.is_stalemate():
+      return False
+
+    self.update_screen(self.human.valid_moves, self.board)
+    self.stalemate_draw = True
+    return True
 
   def no_captures_in_50(self):
-    if len(self.move_history.move_log) > 50:
-      moves = self.move_history.move_log[-50:]
-      captures = [move for move in moves if "x" in move]
-      if len(captures) == 0:
-        self.no_captures_50 = True
+    # Fifty moves by each player without a capture or a pawn move is a draw
+    if self.status.halfmove_clock >= FIFTY_MOVE_PLIES:
+      self.update_screen(self.human.valid_moves, self.board)
+      self.no_captures_50 = True
 
   def insufficient_material(self):
-    white_material = {"Knights": 0, "Bishops": 0}
-    black_material = {"Knights": 0, "Bishops": 0}
-
-    for row in self.board.board:
-      for piece in row:
-
-        # If there is a pawn, rook, or queen on the board, the game is still winnable
-        if isinstance(piece, (Pawn, Rook, Queen)):
-          return False
-
-        if isinstance(piece, Knight):
-          white_material["Knights"] += 1 if piece.color == "White" else 0
-          black_material["Knights"] += 1 if piece.color == "Black" else 0
-        if isinstance(piece, Bishop):
-          white_material["Bishops"] += 1 if piece.color == "White" else 0
-          black_material["Bishops"] += 1 if piece.color == "Black" else 0
-
-    white_pieces = sum(white_material.values())
-    black_pieces = sum(black_material.values())
-
-    if white_pieces * 3 <= 3 and black_pieces * 3 <= 3:
+    # Only kings, with at most one knight or bishop each, can't checkmate
+    if self.status.is_insufficient_material():
       self.update_screen(self.human.valid_moves, self.board)
       self.insufficient_material_draw = True
 
@@ -237,34 +156,49 @@ class Game(object):
     self.turn = "Black" if self.turn == "White" else "White"
 
   def capture(self, piece):
+    self.status.remove_piece(piece)
     if piece.color == "Black":
       self.board.material.add_to_captured_pieces(piece, self.board.material.captured_black_pieces)
     if piece.color == "White":
       self.board.material.add_to_captured_pieces(piece, self.board.material.captured_white_pieces)
 
-  def castle(self, king, rook, dangerous_squares, board):
+  def can_castle(self, king, rook, board):
     # Ensure the king and rook are eligible for castling
     if not (king.can_castle and rook.can_castle):
       return False
 
+    enemy = "Black" if king.color == "White" else "White"
+
     # Long Castle
     if rook.col == 0:
       if any(board.get_piece(king.row, col) != 0 for col in [1, 2, 3]):
         return False  # Pieces blocking the path
-      if any((king.row, col) in dangerous_squares for col in [2, 3, 4]):
+      if any(board.is_attacked(king.row, col, enemy) for col in [2, 3, 4]):
         return False  # Can't castle through check
-      
-      board.move(rook, king.row, 3)
-      board.move(king, king.row, 2)
-      board.move_notation = "O-O-O"
+      return True
 
     # Short Castle
-    elif rook.col == 7:
+    if rook.col == 7:
       if any(board.get_piece(king.row, col) != 0 for col in [5, 6]):
         return False  # Pieces blocking the path
-      if any((king.row, col) in dangerous_squares for col in [4, 5, 6]):
+      if any(board.is_attacked(king.row, col, enemy) for col in [4, 5, 6]):
         return False  # Can't castle through check
-      
+      return True
+
+    return False
+
+  def castle(self, king, rook, board):
+    if not self.can_castle(king, rook, board):
+      return False
+
+    # Long Castle
+    if rook.col == 0:
+      board.move(rook, king.row, 3)
+      board.move(king, king.row, 2)
+      board.move_notation = "O-O-O"
+
+    # Short Castle
+    else:
       board.move(rook, king.row, 5)
       board.move(king, king.row, 6)
       board.move_notation = "O-O"
@@ -276,6 +210,6 @@ class Game(object):
   def detect_promotion(self, piece):
     # If a pawn reaches the other side of the board (any promotion square, let player choose how to promote)
     if isinstance(piece, Pawn):
-      if (piece.color == "White" and piece.row == 0) or (piece.color == "Black" and piece.row == 7):
+      if (piece.direction == "Up" and piece.row == 0) or (piece.direction == "Down" and piece.row == 7):
         return True
     return False
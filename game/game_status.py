@@ -0,0 +1,58 @@
+from pieces.piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+
+
+class GameStatus(object):
+  """
+  What the game over checks need to know about the current position: how many pieces of each type both colors have,
+  how many legal moves the player to move has, whether they are in check and the halfmove clock.
+  Piece counts only change with captures and promotions, so they are kept up to date move by move instead of scanning
+  the board, and the legal moves are generated once per move on a Position.
+  """
+
+  def __init__(self):
+    # piece_counts[color][piece type], with the color and type codes of pieces.piece
+    self.piece_counts = [[0] * 6 for _ in range(2)]
+    self.legal_move_count = 0
+    self.in_check = False
+    self.halfmove_clock = 0
+
+  def count_pieces(self, board):
+    # A full count, for a board that was just set up
+    for counts in self.piece_counts:
+      counts[:] = [0] * 6
+    for row in board.board:
+      for piece in row:
+        if piece != 0:
+          self.piece_counts[piece.color_code][piece.type_code] += 1
+
+  def remove_piece(self, piece):
+    self.piece_counts[piece.color_code][piece.type_code] -= 1
+
+  def promote(self, pawn, piece):
+    self.piece_counts[pawn.color_code][pawn.type_code] -= 1
+    self.piece_counts[piece.color_code][piece.type_code] += 1
+
+  def update(self, position):
+    """
+    Called after every move with the Position of the board, from the point of view of the player to move.
+    """
+    self.legal_move_count = len(position.legal_moves())
+    self.in_check = position.in_check()
+    self.halfmove_clock = position.halfmove_clock
+
+  def is_checkmate(self):
+    return self.in_check and self.legal_move_count == 0
+
+  def is_stalemate(self):
+    return not self.in_check and self.legal_move_count == 0
+
+  def is_insufficient_material(self):
+    # With a pawn, rook or queen on the board the game is still winnable, and so it is with two minor pieces
+    for counts in self.piece_counts:
+      if counts[PAWN] or counts[ROOK] or counts[QUEEN] or counts[KNIGHT] + counts[BISHOP] > 1:
+        return False
+    return True
+
+  def material(self, color, piece_values):
+    # The total value of a color's pieces, with piece_values indexed by piece type (the king is left out)
+    return sum(count * value for count, value in zip(self.piece_counts[color], piece_values))
@@ -0,0 +1,172 @@
+import argparse
+import time
+from game.game import Game
+from game.board import Board
+from game.position import START_FEN
+from pieces.pawn import Pawn
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.rook import Rook
+from pieces.queen import Queen
+from pieces.king import King
+
+# Reference positions from https://www.chessprogramming.org/Perft_Results, with their node counts at depth 1, 2, 3...
+REFERENCE_POSITIONS = [
+  ("Start", START_FEN, (20, 400, 8902, 197281)),
+  ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", (48, 2039, 97862)),
+  ("Position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238)),
+  ("Position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", (6, 264, 9467)),
+  ("Position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379)),
+  ("Position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", (46, 2079, 89890)),
+]
+
+PROMOTION_CHOICES = (Queen, Rook, Bishop, Knight)
+
+
+class Perft(object):
+  """
+  Counts the leaf nodes of the move tree on a Board, generating moves with the pieces package and playing them with
+  Computer.simulate_move and undo_move like the computer does. Comparing the counts with known results checks the
+  move generation, and the time it takes measures its speed.
+  """
+
+  def __init__(self, fen=START_FEN, player_color="White"):
+    self.game = Game(None, player_color, 0)
+    self.game.board, self.game.turn = Board.from_fen(fen, player_color)
+    self.board = self.game.board
+    self.computer = self.game.computer
+
+  def legal_moves(self, color):
+    """
+    Returns the legal moves for a color as (piece, (row, col), promotion) tuples. Castling moves the king onto its rook.
+    """
+    board = self.board
+    enemy = "Black" if color == "White" else "White"
+    king = board.get_king(color)
+    king.is_checked = board.is_attacked(king.row, king.col, enemy)
+
+    # the pieces are collected first, since simulating moves changes the board
+    pieces = [piece for row in board.board for piece in row if piece != 0 and piece.color == color]
+
+    moves = []
+    for piece in pieces:
+      for target in piece.get_valid_moves(board.board):
+        target_piece = board.get_piece(*target)
+        if isinstance(piece, King) and isinstance(target_piece, Rook) and target_piece.color == color:
+          if self.game.can_castle(piece, target_piece, board):
+            moves.append((piece, target, None))
+          continue
+
+        if isinstance(piece, Pawn) and target[0] in (0, 7):
+          promotions = PROMOTION_CHOICES
+        else:
+          promotions = (None,)
+
+        for promotion in promotions:
+          move = (piece, target, promotion)
+          self.simulate_move(move, color)
+          if not board.is_attacked(king.row, king.col, enemy):
+            moves.append(move)
+          self.computer.undo_move(board, self.game)
+
+    return moves
+
+  def simulate_move(self, move, color):
+    piece, target, promotion = move
+    if promotion is None:
+      self.computer.simulate_move(piece, self.board, self.game, target, color)
+    else:
+      self.computer.simulate_move(piece, self.board, self.game, target, color, promotion)
+
+  def perft(self, depth, color=None):
+    color = color or self.game.turn
+    moves = self.legal_moves(color)
+    if depth <= 1:
+      return len(moves) if depth == 1 else 1
+
+    enemy = "Black" if color == "White" else "White"
+    nodes = 0
+    for move in moves:
+      self.simulate_move(move, color)
+      nodes += self.perft(depth - 1, enemy)
+      self.computer.undo_move(self.board, self.game)
+    return nodes
+
+  def divide(self, depth):
+    """
+    Returns the node count below every legal move, keyed by the move in coordinate notation (like e2e4 or e1g1).
+    """
+    color = self.game.turn
+    enemy = "Black" if color == "White" else "White"
+    counts = {}
+    for move in self.legal_moves(color):
+      name = self.move_name(move)
+      self.simulate_move(move, color)
+      counts[name] = self.perft(depth - 1, enemy)
+      self.computer.undo_move(self.board, self.game)
+    return counts
+
+  def move_name(self, move):
+    piece, target, promotion = move
+    if isinstance(piece, King) and abs(target[1] - piece.col) > 1:
+      target = (target[0], 6 if target[1] == 7 else 2)
+
+    name = self.square_name(piece.row, piece.col) + self.square_name(*target)
+    if promotion is not None:
+      name += promotion.letter.lower()
+    return name
+
+  def square_name(self, row, col):
+    row, col = self.board.get_square(row, col)
+    return "abcdefgh"[col] + str(8 - row)
+
+
+def run_reference_positions(max_depth, player_color="White"):
+  """
+  Runs perft on the reference positions up to max_depth and prints the node counts and speed.
+  Returns True if every count matches.
+  """
+  all_passed = True
+  total_nodes, total_time = 0, 0
+  for name, fen, expected_counts in REFERENCE_POSITIONS:
+    perft = Perft(fen, player_color)
+    for depth, expected in enumerate(expected_counts[:max_depth], 1):
+      start_time = time.time()
+      nodes = perft.perft(depth)
+      elapsed_time = time.time() - start_time
+      total_nodes += nodes
+      total_time += elapsed_time
+
+      passed = nodes == expected
+      all_passed = all_passed and passed
+      print("{:<12} depth {:<3} {:>10} nodes {:>8.2f}s {:>8} nps  {}".format(
+        name, depth, nodes, elapsed_time, int(nodes / max(elapsed_time, 1e-9)),
+        "OK" if passed else f"FAILED (expected {expected})"))
+
+  print(f"Total: {total_nodes} nodes in {total_time:.2f}s ({int(total_nodes / max(total_time, 1e-9))} nps)")
+  return all_passed
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Count move tree leaf nodes (perft) to test the move generator.")
+  parser.add_argument("depth", type=int, nargs="?", default=3, help="search depth (default 3)")
+  parser.add_argument("--fen", help="print the divide of this position instead of running the reference positions")
+  parser.add_argument("--black", action="store_true", help="use a board with Black at the bottom")
+  args = parser.parse_args()
+  player_color = "Black" if args.black else "White"
+
+  if args.fen is None:
+    raise SystemExit(0 if run_reference_positions(args.depth, player_color) else 1)
+
+  perft = Perft(args.fen, player_color)
+  start_time = time.time()
+  counts = perft.divide(args.depth)
+  elapsed_time = time.time() - start_time
+  for name, nodes in sorted(counts.items()):
+    print(f"{name}: {nodes}")
+  total_nodes = sum(counts.values())
+  print(f"\nNodes: {total_nodes} in {elapsed_time:.2f}s ({int(total_nodes / max(elapsed_time, 1e-9))} nps)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,692 @@
+from game.zobrist import zobrist_hashing, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from game.attacks import FULL_BOARD, NOT_FILE_A, NOT_FILE_H, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE, \
+  rook_attacks, bishop_attacks, queen_attacks
+from game.board import Board
+from pieces import pawn, knight, bishop, rook, queen, king
+from pieces.pawn import Pawn
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.rook import Rook
+from pieces.queen import Queen
+from pieces.king import King
+from pieces.piece import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, COLOR_NAMES, PIECE_NAMES
+
+# Squares are numbered 0 (a8) to 63 (h1), row by row from White's side of the board, so
+# square = row * 8 + col and bit n of a bitboard is set when there is a piece on square n.
+# Colors and piece types use the integer codes from pieces.piece.
+EMPTY = -1
+
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+
+ROW_2 = 0xFF << 16  # the row White pawns reach after moving one square from their starting row
+ROW_5 = 0xFF << 40  # the row Black pawns reach after moving one square from their starting row
+
+# FEN letters of the pieces, indexed like Position.pieces
+FEN_PIECES = "PNBRQKpnbrqk"
+FEN_CASTLING = (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE))
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Castling rights that are lost when a piece moves from or to a square
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[0] = 15 ^ BLACK_QUEENSIDE
+CASTLING_MASKS[4] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[7] = 15 ^ BLACK_KINGSIDE
+CASTLING_MASKS[56] = 15 ^ WHITE_QUEENSIDE
+CASTLING_MASKS[60] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[63] = 15 ^ WHITE_KINGSIDE
+
+# The castling right that belongs to a rook on each corner
+ROOK_CASTLING_RIGHTS = {0: BLACK_QUEENSIDE, 7: BLACK_KINGSIDE, 56: WHITE_QUEENSIDE, 63: WHITE_KINGSIDE}
+
+# Position keys, shared with Board so a position has the same hash in both representations
+PIECE_KEYS = [
+  [zobrist_hashing.zobrist_table[(square // 8, square % 8, PIECE_NAMES[piece % 6], COLOR_NAMES[piece // 6])]
+   for square in range(64)]
+  for piece in range(12)
+]
+CASTLING_KEYS = zobrist_hashing.castling_table
+EN_PASSANT_KEYS = zobrist_hashing.en_passant_table
+SIDE_KEY = zobrist_hashing.side_key
+
+# Piece evaluations from https://www.chessprogramming.org/Simplified_Evaluation_Function
+PIECE_MATERIAL = (100, 320, 330, 500, 900, 20000)
+PIECE_EVALUATION_TABLES = (
+  (pawn.white_pawn_eval_table, knight.white_knight_eval_table, bishop.white_bishop_eval_table,
+   rook.white_rook_eval_table, queen.white_queen_eval_table, king.white_king_eval_table),
+  (pawn.black_pawn_eval_table, knight.black_knight_eval_table, bishop.black_bishop_eval_table,
+   rook.black_rook_eval_table, queen.black_queen_eval_table, king.black_king_eval_table),
+)
+
+# Material plus piece square value of every piece on every square, indexed like Position.pieces
+PIECE_VALUES = [
+  [PIECE_MATERIAL[piece % 6] + square_value for square_value in PIECE_EVALUATION_TABLES[piece // 6][piece % 6]]
+  for piece in range(12)
+]
+
+# The same values from White's point of view, which are added up as pieces are placed and removed
+PIECE_SCORES = [[value if piece < 6 else -value for value in PIECE_VALUES[piece]] for piece in range(12)]
+
+
+def move_from(move):
+  return move & 63
+
+
+def move_to(move):
+  return (move >> 6) & 63
+
+
+def move_promotion(move):
+  return move >> 12
+
+
+def create_move(from_square, to_square, promotion=0):
+  return from_square | (to_square << 6) | (promotion << 12)
+
+
+def square_name(square):
+  return "abcdefgh"[square % 8] + str(8 - square // 8)
+
+
+def parse_square(name):
+  if len(name) != 2 or name[0] not in "abcdefgh" or name[1] not in "12345678":
+    raise ValueError(f"Invalid square: {name}")
+  return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+def move_name(move):
+  """
+  Returns the move in coordinate notation, like e2e4 or e7e8q.
+  """
+  name = square_name(move & 63) + square_name((move >> 6) & 63)
+  if move >> 12:
+    name += FEN_PIECES[6 + (move >> 12)]
+  return name
+
+
+# Undo records are allocated up front for this many plies, which is deeper than any search
+MAX_PLY = 256
+
+# The game is drawn once the halfmove clock reaches this: fifty moves by each player without a capture or pawn move
+FIFTY_MOVE_PLIES = 100
+
+
+class UndoRecord(object):
+  """
+  The state that make_move can't recover from the move itself. Records are reused by ply, so making a move allocates nothing.
+  """
+  __slots__ = ("move", "captured", "castling", "en_passant", "halfmove_clock", "hash")
+
+  def __init__(self):
+    self.move = 0
+    self.captured = EMPTY
+    self.castling = 0
+    self.en_passant = None
+    self.halfmove_clock = 0
+    self.hash = 0
+
+
+class Position(object):
+  """
+  A bitboard representation of a chess position that the computer searches on.
+  pieces holds twelve bitboards indexed by color * 6 + piece type, and squares maps every square to
+  the piece index on it (or EMPTY) so captured pieces can be found without scanning the bitboards.
+  evaluation is the material and piece square score from White's point of view, kept up to date as pieces move.
+  """
+
+  def __init__(self):
+    self.pieces = [0] * 12
+    self.occupied = [0, 0]
+    self.squares = [EMPTY] * 64
+    self.side = WHITE
+    self.castling = 0
+    self.en_passant = None
+    self.halfmove_clock = 0
+    self.fullmove_number = 1
+    self.hash = 0
+    self.evaluation = 0
+    self.undo_stack = [UndoRecord() for _ in range(MAX_PLY)]
+    self.ply = 0
+
+    # The hashes of the positions before every move, pushed by make_move and popped by unmake_move. A game can fill
+    # it with the positions played before this one, so that the search sees repetitions of them too.
+    self.key_history = []
+
+  @classmethod
+  def from_board(cls, board, turn, halfmove_clock=0, fullmove_number=1):
+    position = cls()
+    for row in board.board:
+      for piece in row:
+        if piece != 0:
+          row_index, col_index = board.get_square(piece.row, piece.col)
+          position.add_piece(piece.color_code * 6 + piece.type_code, row_index * 8 + col_index)
+
+    position.side = COLOR_NAMES.index(turn)
+    position.castling = board.get_castling_rights()
+    if board.en_passant_pawn is not None:
+      row_index, col_index = board.get_square(board.en_passant_pawn.row, board.en_passant_pawn.col)
+      # the en passant square is the one the pawn skipped over
+      position.en_passant = (row_index + (1 if board.en_passant_pawn.color == "White" else -1)) * 8 + col_index
+
+    position.halfmove_clock = halfmove_clock
+    position.fullmove_number = fullmove_number
+    position.hash = position.calculate_hash()
+    return position
+
+  @classmethod
+  def from_fen(cls, fen):
+    """
+    Creates a position from a FEN string. The halfmove clock and fullmove number fields can be left out.
+    Raises ValueError if the FEN is invalid or the position is illegal.
+    """
+    fields = fen.split()
+    rows = fields[0].split("/") if fields else []
+    if len(fields) < 4 or len(rows) != 8 or fields[1] not in ("w", "b"):
+      raise ValueError(f"Invalid FEN: {fen}")
+
+    position = cls()
+    for row, row_text in enumerate(rows):
+      col = 0
+      for char in row_text:
+        if char in "12345678":
+          col += int(char)
+        elif char in FEN_PIECES and col < 8:
+          position.add_piece(FEN_PIECES.index(char), row * 8 + col)
+          col += 1
+        else:
+          raise ValueError(f"Invalid FEN: {fen}")
+
+      if col != 8:
+        raise ValueError(f"Invalid FEN: {fen}")
+
+    # the search and move generation need exactly one king per side
+    if any(bin(position.pieces[color * 6 + KING]).count("1") != 1 for color in (WHITE, BLACK)):
+      raise ValueError(f"Invalid FEN, both sides need exactly one king: {fen}")
+
+    position.side = WHITE if fields[1] == "w" else BLACK
+    if position.left_king_in_check():
+      raise ValueError(f"Invalid FEN, the side not to move is in check: {fen}")
+
+    for letter, right in FEN_CASTLING:
+      if letter in fields[2]:
+        position.castling |= right
+    # rights whose king or rook isn't on its home square are dropped, like Board.from_fen does
+    for square, piece in ((60, WHITE * 6 + KING), (56, WHITE * 6 + ROOK), (63, WHITE * 6 + ROOK),
+                          (4, BLACK * 6 + KING), (0, BLACK * 6 + ROOK), (7, BLACK * 6 + ROOK)):
+      if position.squares[square] != piece:
+        position.castling &= CASTLING_MASKS[square]
+    if fields[3] != "-":
+      position.en_passant = parse_square(fields[3])
+      # the square must be the one a pawn of the side not to move just skipped over, with the pawn in front of it
+      if position.side == WHITE:
+        en_passant_row, pawn_square, pawn = 2, position.en_passant + 8, BLACK * 6 + PAWN
+      else:
+        en_passant_row, pawn_square, pawn = 5, position.en_passant - 8, WHITE * 6 + PAWN
+      if position.en_passant // 8 != en_passant_row or position.squares[pawn_square] != pawn or \
+          position.squares[position.en_passant] != EMPTY:
+        raise ValueError(f"Invalid FEN, no pawn can be captured en passant on {fields[3]}: {fen}")
+    if len(fields) > 4:
+      position.halfmove_clock = int(fields[4])
+    if len(fields) > 5:
+      position.fullmove_number = int(fields[5])
+
+    position.hash = position.calculate_hash()
+    return position
+
+  def to_fen(self):
+    rows = []
+    for row in range(8):
+      row_text, empty = "", 0
+      for piece in self.squares[row * 8:row * 8 + 8]:
+        if piece == EMPTY:
+          empty += 1
+          continue
+        if empty:
+          row_text += str(empty)
+          empty = 0
+        row_text += FEN_PIECES[piece]
+      rows.append(row_text + (str(empty) if empty else ""))
+
+    castling = "".join(letter for letter, right in FEN_CASTLING if self.castling & right) or "-"
+    en_passant = square_name(self.en_passant) if self.en_passant is not None else "-"
+    return " ".join(["/".join(rows), "w" if self.side == WHITE else "b", castling, en_passant,
+                     str(self.halfmove_clock), str(self.fullmove_number)])
+
+  def to_board(self, player_color):
+    board = Board(player_color)
+    for square, piece in enumerate(self.squares):
+      if piece == EMPTY:
+        continue
+
+      color, piece_type = COLOR_NAMES[piece // 6], piece % 6
+      row, col = board.get_square(square // 8, square % 8)
+      if piece_type == PAWN:
+        moves_up = (color == "White") == (player_color == "White")
+        board_piece = Pawn(row, col, color, "Up" if moves_up else "Down")
+      else:
+        board_piece = PIECE_CLASSES[piece_type](row, col, color)
+
+      if piece_type == KING:
+        rights = WHITE_KINGSIDE | WHITE_QUEENSIDE if color == "White" else BLACK_KINGSIDE | BLACK_QUEENSIDE
+        board_piece.can_castle = bool(self.castling & rights)
+      elif piece_type == ROOK:
+        board_piece.can_castle = bool(self.castling & ROOK_CASTLING_RIGHTS.get(square, 0))
+
+      board.set_piece(row, col, board_piece)
+
+    if self.en_passant is not None:
+      # the pawn that can be captured is on the square in front of the en passant square
+      pawn_square = self.en_passant + (-8 if self.side == BLACK else 8)
+      row, col = board.get_square(pawn_square // 8, pawn_square % 8)
+      board.en_passant_pawn = board.board[row][col]
+      board.en_passant_pawn.vulnerable_to_en_passant = True
+
+    board.halfmove_clock = self.halfmove_clock
+    board.fullmove_number = self.fullmove_number
+    board.update_hash(COLOR_NAMES[self.side])
+    return board
+
+  def calculate_hash(self):
+    h = 0
+    for square, piece in enumerate(self.squares):
+      if piece != EMPTY:
+        h ^= PIECE_KEYS[piece][square]
+
+    h ^= CASTLING_KEYS[self.castling]
+    if self.en_passant is not None:
+      h ^= EN_PASSANT_KEYS[self.en_passant & 7]
+    if self.side == BLACK:
+      h ^= SIDE_KEY
+    return h
+
+  def calculate_evaluation(self):
+    """
+    Calculates the evaluation from scratch, to check the incremental one.
+    """
+    evaluation = 0
+    for square, piece in enumerate(self.squares):
+      if piece != EMPTY:
+        evaluation += PIECE_SCORES[piece][square]
+    return evaluation
+
+  def add_piece(self, piece, square):
+    bit = 1 << square
+    self.pieces[piece] |= bit
+    self.occupied[piece // 6] |= bit
+    self.squares[square] = piece
+    self.evaluation += PIECE_SCORES[piece][square]
+
+  def remove_piece(self, piece, square):
+    bit = 1 << square
+    self.pieces[piece] ^= bit
+    self.occupied[piece // 6] ^= bit
+    self.squares[square] = EMPTY
+    self.evaluation -= PIECE_SCORES[piece][square]
+
+  def move_piece(self, piece, from_square, to_square):
+    bits = (1 << from_square) | (1 << to_square)
+    self.pieces[piece] ^= bits
+    self.occupied[piece // 6] ^= bits
+    self.squares[from_square] = EMPTY
+    self.squares[to_square] = piece
+    scores = PIECE_SCORES[piece]
+    self.evaluation += scores[to_square] - scores[from_square]
+
+  def king_square(self, color):
+    return self.pieces[color * 6 + KING].bit_length() - 1
+
+  def has_non_pawn_material(self, color):
+    base = color * 6
+    pieces = self.pieces
+    return (pieces[base + KNIGHT] | pieces[base + BISHOP] | pieces[base + ROOK] | pieces[base + QUEEN]) != 0
+
+  def attackers(self, square, color, occupied):
+    """
+    Returns a bitboard of the pieces of the given color that attack the square, with sliding pieces blocked by occupied.
+    """
+    pieces = self.pieces
+    base = color * 6
+    return ((KNIGHT_ATTACKS[square] & pieces[base + KNIGHT]) |
+            (PAWN_ATTACKS[color ^ 1][square] & pieces[base + PAWN]) |
+            (KING_ATTACKS[square] & pieces[base + KING]) |
+            (rook_attacks(square, occupied) & (pieces[base + ROOK] | pieces[base + QUEEN])) |
+            (bishop_attacks(square, occupied) & (pieces[base + BISHOP] | pieces[base + QUEEN])))
+
+  def is_square_attacked(self, square, color):
+    """
+    Returns True if any piece of the given color attacks the square.
+    """
+    return self.attackers(square, color, self.occupied[WHITE] | self.occupied[BLACK]) != 0
+
+  def in_check(self):
+    return self.is_square_attacked(self.king_square(self.side), self.side ^ 1)
+
+  def left_king_in_check(self):
+    """
+    Returns True if the last move left the king of the player who made it in check, which makes it illegal.
+    """
+    return self.is_square_attacked(self.king_square(self.side ^ 1), self.side)
+
+  def is_fifty_move_draw(self):
+    return self.halfmove_clock >= FIFTY_MOVE_PLIES
+
+  def is_repetition(self, ply):
+    """
+    Returns True if the search should score the position as a draw by repetition: it already occurred in the last ply
+    moves (the ones the search made), or twice in the game before that. Only positions since the last capture or pawn
+    move are compared, since the ones before it can't occur again.
+    """
+    keys = self.key_history
+    count = 0
+    # the same side is to move every other ply, and it takes at least 4 plies to get back to a position
+    stop = max(len(keys) - self.halfmove_clock, 0)
+    for i in range(len(keys) - 4, stop - 1, -2):
+      if keys[i] == self.hash:
+        if len(keys) - i <= ply:
+          return True
+        count += 1
+        if count == 2:
+          return True
+    return False
+
+  def legal_moves(self):
+    """
+    Generates the legal moves of the player to move. The pieces giving check and the pinned pieces are found once,
+    so moves that would leave the king in check are never generated and no move has to be played to test it.
+    """
+    moves = []
+    side = self.side
+    enemy_side = side ^ 1
+    base = side * 6
+    enemy_base = enemy_side * 6
+    pieces = self.pieces
+    own = self.occupied[side]
+    enemy = self.occupied[enemy_side]
+    occupied = own | enemy
+    king_square = pieces[base + KING].bit_length() - 1
+
+    # The king can't move to an attacked square, including squares behind it on the line of a sliding attacker
+    occupied_without_king = occupied ^ (1 << king_square)
+    targets = KING_ATTACKS[king_square] & ~own
+    while targets:
+      bit = targets & -targets
+      targets ^= bit
+      to_square = bit.bit_length() - 1
+      if not self.attackers(to_square, enemy_side, occupied_without_king):
+        moves.append(king_square | (to_square << 6))
+
+    # In double check only the king can move. In single check the other pieces have to capture the checking piece
+    # or block it, and without check they can move anywhere
+    checkers = self.attackers(king_square, enemy_side, occupied)
+    if checkers & (checkers - 1):
+      return moves
+    if checkers:
+      check_mask = checkers | BETWEEN[king_square][checkers.bit_length() - 1]
+    else:
+      check_mask = FULL_BOARD
+      self.add_castling_moves(moves, king_square, occupied)
+
+    # A piece is pinned if it is the only piece between its king and an enemy sliding piece, and can only move along that line
+    pinned = 0
+    pin_lines = {}
+    snipers = ((rook_attacks(king_square, enemy) & (pieces[enemy_base + ROOK] | pieces[enemy_base + QUEEN])) |
+               (bishop_attacks(king_square, enemy) & (pieces[enemy_base + BISHOP] | pieces[enemy_base + QUEEN])))
+    while snipers:
+      bit = snipers & -snipers
+      snipers ^= bit
+      sniper_square = bit.bit_length() - 1
+      blockers = BETWEEN[king_square][sniper_square] & occupied
+      if blockers & own and not blockers & (blockers - 1):
+        pinned |= blockers
+        pin_lines[blockers.bit_length() - 1] = LINE[king_square][sniper_square]
+
+    # Pawns
+    pawns = pieces[base + PAWN]
+    empty = FULL_BOARD ^ occupied
+    self.add_pawn_moves(moves, pawns & ~pinned, empty, enemy, check_mask)
+    pinned_pawns = pawns & pinned
+    while pinned_pawns:
+      bit = pinned_pawns & -pinned_pawns
+      pinned_pawns ^= bit
+      self.add_pawn_moves(moves, bit, empty, enemy, check_mask & pin_lines[bit.bit_length() - 1])
+
+    # An en passant capture removes two pawns from the same row, which can uncover a check that the pins above miss,
+    # so these rare moves are tested by playing them
+    if self.en_passant is not None:
+      candidates = PAWN_ATTACKS[enemy_side][self.en_passant] & pawns
+      while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        move = (bit.bit_length() - 1) | (self.en_passant << 6)
+        self.make_move(move)
+        if not self.left_king_in_check():
+          moves.append(move)
+        self.unmake_move()
+
+    # Knights, which can never move when pinned
+    targets_mask = check_mask & ~own
+    knights = pieces[base + KNIGHT] & ~pinned
+    while knights:
+      bit = knights & -knights
+      knights ^= bit
+      from_square = bit.bit_length() - 1
+      self.add_moves(moves, from_square, KNIGHT_ATTACKS[from_square] & targets_mask)
+
+    # Sliding pieces
+    for piece_type, attacks in ((BISHOP, bishop_attacks), (ROOK, rook_attacks), (QUEEN, queen_attacks)):
+      sliders = pieces[base + piece_type]
+      while sliders:
+        bit = sliders & -sliders
+        sliders ^= bit
+        from_square = bit.bit_length() - 1
+        targets = attacks(from_square, occupied) & targets_mask
+        if bit & pinned:
+          targets &= pin_lines[from_square]
+        self.add_moves(moves, from_square, targets)
+
+    return moves
+
+  def add_moves(self, moves, from_square, targets):
+    while targets:
+      bit = targets & -targets
+      targets ^= bit
+      moves.append(from_square | ((bit.bit_length() - 1) << 6))
+
+  def add_pawn_moves(self, moves, pawns, empty, enemy, target_mask):
+    """
+    Adds the pushes and captures of a set of pawns that land on the target mask, without en passant.
+    """
+    if self.side == WHITE:
+      single_pushes = (pawns >> 8) & empty
+      double_pushes = ((single_pushes & ROW_5) >> 8) & empty
+      left_captures = (pawns >> 9) & NOT_FILE_H & enemy
+      right_captures = (pawns >> 7) & NOT_FILE_A & enemy
+      forward, promotion_row = -8, 0
+    else:
+      single_pushes = (pawns << 8) & empty
+      double_pushes = ((single_pushes & ROW_2) << 8) & empty
+      left_captures = (pawns << 7) & NOT_FILE_H & enemy
+      right_captures = (pawns << 9) & NOT_FILE_A & enemy
+      forward, promotion_row = 8, 7
+
+    for targets, offset in ((single_pushes, forward), (double_pushes, 2 * forward),
+                            (left_captures, forward - 1), (right_captures, forward + 1)):
+      targets &= target_mask
+      while targets:
+        bit = targets & -targets
+        targets ^= bit
+        to_square = bit.bit_length() - 1
+        self.add_pawn_move(moves, to_square - offset, to_square, promotion_row)
+
+  def add_pawn_move(self, moves, from_square, to_square, promotion_row):
+    move = from_square | (to_square << 6)
+    if to_square // 8 == promotion_row:
+      moves.extend((move | (QUEEN << 12), move | (ROOK << 12), move | (BISHOP << 12), move | (KNIGHT << 12)))
+    else:
+      moves.append(move)
+
+  def add_castling_moves(self, moves, king_square, occupied):
+    if self.side == WHITE:
+      kingside, queenside = WHITE_KINGSIDE, WHITE_QUEENSIDE
+    else:
+      kingside, queenside = BLACK_KINGSIDE, BLACK_QUEENSIDE
+
+    if not self.castling & (kingside | queenside):
+      return
+
+    # the squares between the king and rook must be empty, and the king can't pass through or land on an attacked square
+    enemy = self.side ^ 1
+    if self.castling & kingside and not occupied & (0b11 << (king_square + 1)):
+      if not self.is_square_attacked(king_square + 1, enemy) and not self.is_square_attacked(king_square + 2, enemy):
+        moves.append(king_square | ((king_square + 2) << 6))
+
+    if self.castling & queenside and not occupied & (0b111 << (king_square - 3)):
+      if not self.is_square_attacked(king_square - 1, enemy) and not self.is_square_attacked(king_square - 2, enemy):
+        moves.append(king_square | ((king_square - 2) << 6))
+
+  def is_capture(self, move):
+    to_square = (move >> 6) & 63
+    if self.squares[to_square] != EMPTY:
+      return True
+    return to_square == self.en_passant and self.squares[move & 63] % 6 == PAWN
+
+  def make_move(self, move):
+    from_square = move & 63
+    to_square = (move >> 6) & 63
+    promotion = move >> 12
+    side = self.side
+    piece = self.squares[from_square]
+    captured = self.squares[to_square]
+
+    # a game can be longer than the records allocated up front
+    if self.ply == len(self.undo_stack):
+      self.undo_stack.append(UndoRecord())
+    record = self.undo_stack[self.ply]
+    self.ply += 1
+    record.move = move
+    record.captured = captured
+    record.castling = self.castling
+    record.en_passant = self.en_passant
+    record.halfmove_clock = self.halfmove_clock
+    record.hash = self.hash
+    self.key_history.append(self.hash)
+
+    h = self.hash
+    if self.en_passant is not None:
+      h ^= EN_PASSANT_KEYS[self.en_passant & 7]
+    en_passant = self.en_passant
+    self.en_passant = None
+
+    self.halfmove_clock += 1
+    if captured != EMPTY:
+      self.remove_piece(captured, to_square)
+      h ^= PIECE_KEYS[captured][to_square]
+      self.halfmove_clock = 0
+
+    self.move_piece(piece, from_square, to_square)
+    h ^= PIECE_KEYS[piece][from_square] ^ PIECE_KEYS[piece][to_square]
+
+    piece_type = piece - side * 6
+    if piece_type == PAWN:
+      self.halfmove_clock = 0
+      if to_square == en_passant:
+        captured_square = to_square + (8 if side == WHITE else -8)
+        enemy_pawn = (side ^ 1) * 6 + PAWN
+        self.remove_piece(enemy_pawn, captured_square)
+        h ^= PIECE_KEYS[enemy_pawn][captured_square]
+      elif abs(to_square - from_square) == 16:
+        self.en_passant = (from_square + to_square) // 2
+        h ^= EN_PASSANT_KEYS[self.en_passant & 7]
+      elif promotion:
+        self.remove_piece(piece, to_square)
+        self.add_piece(side * 6 + promotion, to_square)
+        h ^= PIECE_KEYS[piece][to_square] ^ PIECE_KEYS[side * 6 + promotion][to_square]
+
+    elif piece_type == KING and abs(to_square - from_square) == 2:
+      rook = side * 6 + ROOK
+      if to_square > from_square:
+        rook_from, rook_to = from_square + 3, from_square + 1
+      else:
+        rook_from, rook_to = from_square - 4, from_square - 1
+      self.move_piece(rook, rook_from, rook_to)
+      h ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+
+    castling = self.castling & CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+    if castling != self.castling:
+      h ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+      self.castling = castling
+
+    if side == BLACK:
+      self.fullmove_number += 1
+    self.side = side ^ 1
+    self.hash = h ^ SIDE_KEY
+
+  def make_null_move(self):
+    """
+    Passes the turn to the other side without moving a piece, for null move pruning. Undone with unmake_null_move.
+    """
+    if self.ply == len(self.undo_stack):
+      self.undo_stack.append(UndoRecord())
+    record = self.undo_stack[self.ply]
+    self.ply += 1
+    record.move = 0
+    record.captured = EMPTY
+    record.castling = self.castling
+    record.en_passant = self.en_passant
+    record.halfmove_clock = self.halfmove_clock
+    record.hash = self.hash
+    self.key_history.append(self.hash)
+
+    h = self.hash
+    if self.en_passant is not None:
+      h ^= EN_PASSANT_KEYS[self.en_passant & 7]
+      self.en_passant = None
+    # a repetition can't span a null move, so it counts as irreversible
+    self.halfmove_clock = 0
+    self.side ^= 1
+    self.hash = h ^ SIDE_KEY
+
+  def unmake_null_move(self):
+    self.ply -= 1
+    record = self.undo_stack[self.ply]
+    self.en_passant = record.en_passant
+    self.halfmove_clock = record.halfmove_clock
+    self.hash = record.hash
+    self.key_history.pop()
+    self.side ^= 1
+
+  def unmake_move(self):
+    self.ply -= 1
+    record = self.undo_stack[self.ply]
+    move = record.move
+    captured = record.captured
+    self.castling = record.castling
+    self.en_passant = record.en_passant
+    self.halfmove_clock = record.halfmove_clock
+    self.hash = record.hash
+    self.key_history.pop()
+    from_square = move & 63
+    to_square = (move >> 6) & 63
+    side = self.side ^ 1
+    self.side = side
+    if side == BLACK:
+      self.fullmove_number -= 1
+
+    piece = self.squares[to_square]
+    if move >> 12:
+      self.remove_piece(piece, to_square)
+      piece = side * 6 + PAWN
+      self.add_piece(piece, to_square)
+
+    self.move_piece(piece, to_square, from_square)
+    piece_type = piece - side * 6
+
+    if captured != EMPTY:
+      self.add_piece(captured, to_square)
+    elif piece_type == PAWN and to_square == self.en_passant:
+      self.add_piece((side ^ 1) * 6 + PAWN, to_square + (8 if side == WHITE else -8))
+    elif piece_type == KING and abs(to_square - from_square) == 2:
+      rook = side * 6 + ROOK
+      if to_square > from_square:
+        self.move_piece(rook, from_square + 1, from_square + 3)
+      else:
+        self.move_piece(rook, from_square - 1, from_square - 4)
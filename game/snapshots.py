@@ -0,0 +1,58 @@
+import queue
+import time
+
+
+class SearchSnapshot(object):
+  """
+  What the visualizer shows of a search in progress: the position being searched (as the squares list of a Position),
+  the line of moves that led to it from the root, the best root move so far and the search statistics.
+  """
+  __slots__ = ("squares", "line", "best_move", "current_best_evaluation", "moves_evaluated", "total_moves_found")
+
+  def __init__(self, squares, line, best_move, current_best_evaluation, moves_evaluated, total_moves_found):
+    self.squares = squares
+    self.line = line
+    self.best_move = best_move
+    self.current_best_evaluation = current_best_evaluation
+    self.moves_evaluated = moves_evaluated
+    self.total_moves_found = total_moves_found
+
+
+class SnapshotChannel(object):
+  """
+  Hands snapshots of a search from the search thread to the pygame loop, which draws them at its own frame rate.
+  The search publishes at most max_rate snapshots per second and only the newest one is kept, so drawing never holds
+  up the search.
+  """
+
+  def __init__(self, max_rate=60):
+    self.snapshots = queue.Queue(maxsize=1)
+    self.interval = 1 / max_rate
+    self.next_publish = 0
+
+  def ready(self):
+    # cheap enough for the search to call at every node
+    return time.monotonic() >= self.next_publish
+
+  def publish(self, snapshot):
+    self.next_publish = time.monotonic() + self.interval
+    self.clear()
+    try:
+      self.snapshots.put_nowait(snapshot)
+    except queue.Full:
+      pass
+
+  def latest(self):
+    """
+    Returns the newest snapshot that wasn't drawn yet, or None.
+    """
+    try:
+      return self.snapshots.get_nowait()
+    except queue.Empty:
+      return None
+
+  def clear(self):
+    try:
+      self.snapshots.get_nowait()
+    except queue.Empty:
+      pass
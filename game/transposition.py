@@ -0,0 +1,87 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Scores at or beyond the threshold mean that one side can force checkmate
+MATE_SCORE = 1000000
+MATE_THRESHOLD = MATE_SCORE - 1000
+
+# Rough size of one bucket (two entry tuples and their fields) in bytes, used to turn a memory budget into a table size
+BUCKET_SIZE = 320
+
+
+class TranspositionTable(object):
+  """
+  A fixed size table of previously searched positions, keyed by Zobrist hash.
+  Every bucket has a depth-preferred slot, which keeps the deepest search of a position, and an always-replace slot
+  for everything else. Entries are (key, depth, score, bound, move, generation) tuples.
+  """
+
+  def __init__(self, size_mb=16):
+    self.size = max(1, (size_mb * 1024 * 1024) // BUCKET_SIZE)
+    self.generation = 0
+    self.clear()
+
+  def clear(self):
+    self.depth_preferred = [None] * self.size
+    self.always_replace = [None] * self.size
+
+  def new_search(self):
+    # entries from older searches can be replaced even if they are deeper
+    self.generation += 1
+
+  def probe(self, key):
+    index = key % self.size
+
+    entry = self.depth_preferred[index]
+    if entry is not None and entry[0] == key:
+      return entry
+
+    entry = self.always_replace[index]
+    if entry is not None and entry[0] == key:
+      return entry
+
+    return None
+
+  def store(self, key, depth, score, bound, move):
+    index = key % self.size
+    entry = (key, depth, score, bound, move, self.generation)
+
+    current = self.depth_preferred[index]
+    if current is None or current[0] == key or current[5] != self.generation or depth >= current[1]:
+      # the replaced entry is still useful, so move it to the always-replace slot
+      if current is not None and current[0] != key:
+        self.always_replace[index] = current
+      self.depth_preferred[index] = entry
+    else:
+      self.always_replace[index] = entry
+
+
+def score_to_tt(score, ply):
+  """
+  Mate scores count plies from the root, but are stored counting from the position itself so they can be reused at any ply.
+  """
+  if score >= MATE_THRESHOLD:
+    return score + ply
+  if score <= -MATE_THRESHOLD:
+    return score - ply
+  return score
+
+
+def score_from_tt(score, ply):
+  if score >= MATE_THRESHOLD:
+    return score - ply
+  if score <= -MATE_THRESHOLD:
+    return score + ply
+  return score
+
+
+def mate_in_moves(score):
+  """
+  Returns the number of moves until checkmate for a mate score, negative if the side the score belongs to is the one
+  getting mated, or None if the score isn't a mate score.
+  """
+  if abs(score) < MATE_THRESHOLD:
+    return None
+  moves = (MATE_SCORE - abs(score) + 1) // 2
+  return moves if score > 0 else -moves
@@ -1,13 +1,29 @@
 import random
 
+# The keys are generated from a fixed seed so a position has the same hash in every run and process
+ZOBRIST_SEED = 0x2F5A1C3D
+
+piece_types = ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King")
+colors = ("White", "Black")
+
+# Castling rights are stored as a 4 bit mask
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
 
 class ZobristHashing:
-  def __init__(self, rows, cols, piece_types, colors):
+  def __init__(self, rows, cols, piece_types, colors, seed=ZOBRIST_SEED):
     self.rows = rows
     self.cols = cols
     self.piece_types = piece_types
     self.colors = colors
+    self.random = random.Random(seed)
     self.zobrist_table = self._initialize_zobrist_table()
+    self.castling_table = [self.random.getrandbits(64) for _ in range(16)]
+    self.en_passant_table = [self.random.getrandbits(64) for _ in range(cols)]
+    self.side_key = self.random.getrandbits(64)
 
   def _initialize_zobrist_table(self):
     table = {}
@@ -15,16 +31,24 @@ class ZobristHashing:
       for col in range(self.cols):
         for piece_type in self.piece_types:
           for color in self.colors:
-            table[(row, col, piece_type, color)] = random.getrandbits(64)
+            table[(row, col, piece_type, color)] = self.random.getrandbits(64)
     return table
 
-  def calculate_hash(self, board):
+  def calculate_hash(self, board, turn):
+    """
+    Calculates the hash of a board from scratch. Squares are always keyed from White's side of the board,
+    so both board orientations produce the same hash for the same position.
+    """
     h = 0
     for row in board.board:
       for piece in row:
         if piece != 0:
-          h ^= self.zobrist_table[(
-            piece.row, piece.col, type(piece).__name__, piece.color)]
+          h = self.update_hash(h, piece, None, board.get_square(piece.row, piece.col))
+
+    h ^= self.castling_table[board.get_castling_rights()]
+    h = self.update_en_passant(h, None, board.get_en_passant_file())
+    if turn == "Black":
+      h ^= self.side_key
     return h
 
   def update_hash(self, h, piece, old_position, new_position):
@@ -37,3 +61,21 @@ class ZobristHashing:
       h ^= self.zobrist_table[(
         new_position[0], new_position[1], piece_type, piece_color)]
     return h
+
+  def update_castling(self, h, old_rights, new_rights):
+    if old_rights != new_rights:
+      h ^= self.castling_table[old_rights] ^ self.castling_table[new_rights]
+    return h
+
+  def update_en_passant(self, h, old_file, new_file):
+    if old_file is not None:
+      h ^= self.en_passant_table[old_file]
+    if new_file is not None:
+      h ^= self.en_passant_table[new_file]
+    return h
+
+  def update_side(self, h):
+    return h ^ self.side_key
+
+
+zobrist_hashing = ZobristHashing(8, 8, piece_types, colors)
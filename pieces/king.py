@@ -1,11 +1,7 @@
-from pieces.piece import Piece
+from pieces.piece import Piece, KING, SQUARES
 from pieces.rook import Rook
-import pygame
 
 
-white_king = pygame.image.load("pieces/assets/White_King.png")
-black_king = pygame.image.load("pieces/assets/Black_King.png")
-kings = [white_king, black_king]
 
 # Piece Square Table
 white_king_eval_table = [
@@ -22,45 +18,39 @@ white_king_eval_table = [
 black_king_eval_table = white_king_eval_table[::-1]
 
 
+king_directions = (
+    (-1, -1), (-1, 0), (-1, 1),  # Up-Left, Up, Up-Right
+    (0, -1), (0, 1),  # Left, Right
+    (1, -1), (1, 0), (1, 1)  # Down-Left, Down, Down-Right
+)
+
+
 class King(Piece):
+  __slots__ = ("can_castle", "is_checked")
+  type_code = KING
+  letter = "K"
+
   def __init__(self, row, col, color):
     super().__init__(row, col, color)
-    self.valid_moves = []
     self.can_castle = True
     self.is_checked = False
-    self.letter = "K"
-
-  def update_valid_moves(self, board):
-    self.valid_moves = self.get_valid_moves(board)
-    return self.valid_moves
-
-  def get_valid_moves(self, board):
-    moves = []
-    directions = [
-        (-1, -1), (-1, 0), (-1, 1),  # Up-Left, Up, Up-Right
-        (0, -1), (0, 1),  # Left, Right
-        (1, -1), (1, 0), (1, 1)  # Down-Left, Down, Down-Right
-    ]
 
+  def add_valid_moves(self, board, moves):
     # Standard King Moves
-    for dx, dy in directions:
+    for dx, dy in king_directions:
       new_row, new_col = self.row + dx, self.col + dy
       if 0 <= new_row < 8 and 0 <= new_col < 8:  # Stay within board
         piece = board[new_row][new_col]
-        if piece == 0 or piece.color != self.color:  # Empty or Opponent's piece
-          moves.append((new_row, new_col))
+        if piece == 0 or piece.color_code != self.color_code:  # Empty or Opponent's piece
+          moves.append(SQUARES[new_row][new_col])
 
+    # Castling is shown as moving the king onto its rook, which has to be in the corner with only empty squares in between
     if self.can_castle and not self.is_checked:
-      # Queenside Castle
-      if all(board[self.row][self.col - i] == 0 for i in range(1, 3)):
-        rook = board[self.row][self.col - 4]
-        if isinstance(rook, Rook) and rook.can_castle:
-          moves.append((self.row, self.col - 4))
-
-      # Kingside Castle
-      if all(board[self.row][self.col + i] == 0 for i in range(1, 2)):
-        rook = board[self.row][self.col + 3]
-        if isinstance(rook, Rook) and rook.can_castle:
-          moves.append((self.row, self.col + 3))
-
-    return moves
+      for step in (-1, 1):  # Queenside, Kingside
+        col = self.col + step
+        while 0 < col < 7 and board[self.row][col] == 0:
+          col += step
+
+        rook = board[self.row][col]
+        if col in (0, 7) and isinstance(rook, Rook) and rook.color_code == self.color_code and rook.can_castle:
+          moves.append(SQUARES[self.row][col])
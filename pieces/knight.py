@@ -1,9 +1,4 @@
-from pieces.piece import Piece
-import pygame
-
-white_knight = pygame.image.load("pieces/assets/White_Knight.png")
-black_knight = pygame.image.load("pieces/assets/Black_Knight.png")
-knights = [white_knight, black_knight]
+from pieces.piece import Piece, KNIGHT, SQUARES
 
 # Piece Square Table
 white_knight_eval_table = [
@@ -20,32 +15,24 @@ white_knight_eval_table = [
 black_knight_eval_table = white_knight_eval_table[::-1]
 
 
-class Knight(Piece):
-  def __init__(self, row, col, color):
-    super().__init__(row, col, color)
-    self.valid_moves = []
-    self.letter = "N"
-
-  def update_valid_moves(self, board):
-    self.valid_moves = self.get_valid_moves(board)
-    return self.valid_moves
+# All possible moves for a knight
+knight_moves = (
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+    (1, -2), (1, 2), (2, -1), (2, 1)
+)
 
-  def get_valid_moves(self, board):
-    moves = []
 
-    # All possible moves for a knight
-    knight_moves = [
-        (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-        (1, -2), (1, 2), (2, -1), (2, 1)
-    ]
+class Knight(Piece):
+  __slots__ = ()
+  type_code = KNIGHT
+  letter = "N"
 
+  def add_valid_moves(self, board, moves):
     for move in knight_moves:
       new_row = self.row + move[0]
       new_col = self.col + move[1]
 
       if 0 <= new_row < 8 and 0 <= new_col < 8:  # Ensure within board bounds
         piece = board[new_row][new_col]
-        if piece == 0 or piece.color != self.color:  # Empty or opponent's piece
-          moves.append((new_row, new_col))
-
-    return moves
+        if piece == 0 or piece.color_code != self.color_code:  # Empty or opponent's piece
+          moves.append(SQUARES[new_row][new_col])
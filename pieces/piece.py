@@ -1,15 +1,43 @@
-from game.constants import square_size
+
+# Small integer codes for colors and piece types, the same ones the bitboard Position uses
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+COLOR_NAMES = ("White", "Black")
+PIECE_NAMES = ("Pawn", "Knight", "Bishop", "Rook", "Queen", "King")
+
+# Every (row, col) square as a shared tuple, so building move lists doesn't create new ones
+SQUARES = [[(row, col) for col in range(8)] for row in range(8)]
 
 
 class Piece(object):
+  """
+  Pieces use __slots__ and keep their color as a small integer code, while the type code is a class attribute.
+  color and type are still available as names for the GUI and the move notation.
+  """
+  __slots__ = ("row", "col", "color_code", "selected", "valid_moves")
+  type_code = None
+  letter = ""
+
   def __init__(self, row, col, color):
     self.row = row
     self.col = col
-    self.type = self.__class__.__name__
-    self.color = color
+    self.color_code = COLOR_NAMES.index(color)
     self.selected = False
     self.valid_moves = []
 
+  @property
+  def color(self):
+    return COLOR_NAMES[self.color_code]
+
+  @color.setter
+  def color(self, color):
+    self.color_code = COLOR_NAMES.index(color)
+
+  @property
+  def type(self):
+    return PIECE_NAMES[self.type_code]
+
   def is_selected(self):
     return self.selected
 
@@ -17,5 +45,36 @@ class Piece(object):
     self.row = row
     self.col = col
 
-  def draw(self, window, image):
-    window.blit(image, (self.col * square_size, self.row * square_size))
+  def update_valid_moves(self, board):
+    # the same list is refilled every time, so it also stays current for anyone holding on to it
+    moves = self.valid_moves
+    moves.clear()
+    self.add_valid_moves(board, moves)
+    return moves
+
+  def get_valid_moves(self, board):
+    moves = []
+    self.add_valid_moves(board, moves)
+    return moves
+
+  def add_valid_moves(self, board, moves):
+    raise NotImplementedError
+
+  def add_sliding_moves(self, board, directions, moves):
+    color_code = self.color_code
+    for dx, dy in directions:
+      row, col = self.row, self.col
+      while True:
+        row += dx
+        col += dy
+
+        if not (0 <= row < 8 and 0 <= col < 8):
+          break
+
+        piece = board[row][col]
+        if piece != 0:
+          if piece.color_code != color_code:
+            moves.append(SQUARES[row][col])
+          break
+
+        moves.append(SQUARES[row][col])
@@ -1,11 +1,6 @@
-from pieces.piece import Piece
-from pieces.rook import Rook
-from pieces.bishop import Bishop
-import pygame
-
-white_queen = pygame.image.load("pieces/assets/White_Queen.png")
-black_queen = pygame.image.load("pieces/assets/Black_Queen.png")
-queens = [white_queen, black_queen]
+from pieces.piece import Piece, QUEEN
+from pieces.rook import rook_directions
+from pieces.bishop import bishop_directions
 
 # Piece Square Table
 white_queen_eval_table = [
@@ -21,21 +16,13 @@ white_queen_eval_table = [
 
 black_queen_eval_table = white_queen_eval_table[::-1]
 
+queen_directions = bishop_directions + rook_directions
 
-class Queen(Piece):
-  def __init__(self, row, col, color):
-    super().__init__(row, col, color)
-    self.valid_moves = []
-    self.letter = "Q"
-
-  def update_valid_moves(self, board):
-    self.valid_moves = self.get_valid_moves(board)
-    return self.valid_moves
 
-  def get_valid_moves(self, board):
-    diagonal_moves = Bishop.get_valid_moves(
-      Bishop(self.row, self.col, self.color), board)
-    straight_moves = Rook.get_valid_moves(
-      Rook(self.row, self.col, self.color), board)
+class Queen(Piece):
+  __slots__ = ()
+  type_code = QUEEN
+  letter = "Q"
 
-    return diagonal_moves + straight_moves
+  def add_valid_moves(self, board, moves):
+    self.add_sliding_moves(board, queen_directions, moves)
@@ -1,144 +1,590 @@
-import pygame
+import time
 from pieces import pawn, knight, bishop, rook, queen, king
 from game.profiler import Profiler
+from game.zobrist import zobrist_hashing
+from game.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, MATE_SCORE, MATE_THRESHOLD, \
+  score_to_tt, score_from_tt
+from game.position import EMPTY, PIECE_VALUES, PIECE_MATERIAL, MAX_PLY, move_from, move_to, move_promotion
+from game.snapshots import SearchSnapshot
+from pieces.piece import WHITE, PAWN
 
 
 class Computer(object):
   WHITE = "White"
   BLACK = "Black"
 
-  # Piece Evaluations from https://www.chessprogramming.org/Simplified_Evaluation_Function
   PIECE_TYPES = (pawn.Pawn, knight.Knight, bishop.Bishop, rook.Rook, queen.Queen, king.King)
-  PIECE_EVALUATION_TABLES = {
-    (WHITE, "Pawn"): (100, pawn.white_pawn_eval_table),
-    (WHITE, "Knight"): (320, knight.white_knight_eval_table),
-    (WHITE, "Bishop"): (330, bishop.white_bishop_eval_table),
-    (WHITE, "Rook"): (500, rook.white_rook_eval_table),
-    (WHITE, "Queen"): (900, queen.white_queen_eval_table),
-    (WHITE, "King"): (20000, king.white_king_eval_table),
-
-    (BLACK, "Pawn"): (100, pawn.black_pawn_eval_table),
-    (BLACK, "Knight"): (320, knight.black_knight_eval_table),
-    (BLACK, "Bishop"): (330, bishop.black_bishop_eval_table),
-    (BLACK, "Rook"): (500, rook.black_rook_eval_table),
-    (BLACK, "Queen"): (900, queen.black_queen_eval_table),
-    (BLACK, "King"): (20000, king.black_king_eval_table),
-  }
-
-  def __init__(self, color):
+
+  # Extra value of a promotion, indexed by the piece type the pawn promotes to
+  PROMOTION_VALUES = (0, 320, 330, 500, 900, 0)
+  PROMOTION_PIECES = (None, knight.Knight, bishop.Bishop, rook.Rook, queen.Queen, None)
+
+  # Quiescence search skips captures that leave the side to move this far behind even after winning the piece
+  DELTA_MARGIN = 200
+
+  # The search algorithms iterative deepening can use: "minimax" (max/min alpha-beta) or "pvs" (principal variation
+  # search in negamax form, with aspiration windows)
+  ALGORITHMS = ("minimax", "pvs")
+
+  # Half the width of the first aspiration window around the score of the previous iteration
+  ASPIRATION_WINDOW = 50
+
+  # Null move pruning lets the side to move pass, and searches the result this many plies shallower than a real move
+  NULL_MOVE_REDUCTION = 2
+
+  # Late move reductions search quiet moves one ply shallower once this many moves of a position were searched
+  LATE_MOVE_INDEX = 3
+
+  def __init__(self, color, hash_size_mb=16, debug_evaluation=False, quiescence=True, algorithm="minimax",
+               null_move_pruning=True, late_move_reductions=True):
     self.profiler = Profiler()
     self.color = color
-    self.transposition_table = {}
-    self.piece_value_cache = {}
+    self.transposition_table = TranspositionTable(hash_size_mb)
+    self.piece_values = PIECE_VALUES
+
+    # When debugging, every evaluation is checked against a full scan of the position
+    self.debug_evaluation = debug_evaluation
+
+    # Search captures and promotions past the depth limit, so the search never stops in the middle of an exchange
+    self.quiescence = quiescence
+
+    if algorithm not in self.ALGORITHMS:
+      raise ValueError(f"Unknown search algorithm: {algorithm}")
+    self.algorithm = algorithm
+
+    # Selective search: skip positions where passing the turn still fails high (null move pruning), and search quiet
+    # moves late in the move ordering less deeply (late move reductions). Both can be turned off to compare.
+    self.null_move_pruning = null_move_pruning
+    self.late_move_reductions = late_move_reductions
+
+    # Quiet moves that caused a beta cutoff, two per ply (killer moves), and a score per side and from/to square pair
+    # that grows every time a quiet move causes a cutoff (history heuristic). Both are used to order quiet moves.
+    self.killer_moves = [[None, None] for _ in range(MAX_PLY)]
+    self.history = [[0] * 4096 for _ in range(2)]
+
+    # Set by iterative deepening, the search stops as soon as it notices that the deadline has passed or that it has
+    # searched node_limit nodes. Setting search_stopped from another thread stops it too.
+    self.search_deadline = None
+    self.node_limit = None
+    self.search_stopped = False
 
     # These values provide the user valuable information about the current state of the minimax search
     self.moves_evaluated = 0
     self.total_moves_found = 0
     self.current_best_evaluation = 0
+    self.root_best_move = None
+
+    # How often null move pruning cut off a position, how many moves were searched with a reduced depth and how many
+    # of those had to be searched again at full depth
+    self.null_move_cutoffs = 0
+    self.reduced_moves = 0
+    self.reduction_re_searches = 0
 
-  def minimax(self, board, game, depth, alpha, beta, max_player):
+  def minimax(self, position, game, depth, alpha, beta, max_player, ply=0, allow_null_move=True):
     """
     Implements the Minimax algorithm to calculate the move that would maximize the AI's positional evaluation.
     Includes alpha-beta pruning to reduce the size of the search tree and reduce redundant computations.
+    Positions that were already searched are looked up in the transposition table, which can either end the search
+    of the position early or tell us which move to search first.
+    The search runs on a bitboard Position, and the best move is returned as a move integer (see game.position).
     """
-    if depth == 0 or game.game_over():
-      return self.evaluate_board(board), board
+    # a repeated position is a draw, since the side that repeated it can keep doing so, and so is one where the
+    # fifty move rule applies
+    if ply > 0 and (position.is_fifty_move_draw() or position.is_repetition(ply)):
+      return 0, None
+
+    if depth == 0:
+      if self.quiescence:
+        return self.quiescence_search(position, game, alpha, beta, max_player, ply), None
+      return self.evaluate_board(position), None
+
+    if self.check_search_stopped():
+      return 0, None
+
+    alpha_original, beta_original = alpha, beta
+    tt_move = None
+    entry = self.transposition_table.probe(position.hash)
+    if entry is not None:
+      _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+      entry_score = score_from_tt(entry_score, ply)
+
+      # the root always searches its moves so that it returns a move that can be played
+      if ply > 0 and entry_depth >= depth:
+        if entry_bound == EXACT:
+          return entry_score, None
+        if entry_bound == LOWER_BOUND:
+          alpha = max(alpha, entry_score)
+        elif entry_bound == UPPER_BOUND:
+          beta = min(beta, entry_score)
+        if beta <= alpha:
+          return entry_score, None
 
     best_move = None
     best_score = float("-inf") if max_player == self.WHITE else float("inf")
     other_player = self.BLACK if max_player == self.WHITE else self.WHITE
+    in_check = position.in_check()
 
-    all_moves = self.get_all_moves(board, game, max_player)
+    # if the side to move is still doing well enough for a cutoff after passing its turn, a real move would be too
+    null_bound = beta if max_player == self.WHITE else alpha
+    if allow_null_move and abs(null_bound) < MATE_THRESHOLD and self.can_try_null_move(position, depth, ply, in_check):
+      null_depth = depth - 1 - self.NULL_MOVE_REDUCTION
+      position.make_null_move()
+      if max_player == self.WHITE:
+        null_score, _ = self.minimax(position, game, null_depth, beta - 1, beta, other_player, ply + 1, False)
+        cutoff = null_score >= beta
+      else:
+        null_score, _ = self.minimax(position, game, null_depth, alpha, alpha + 1, other_player, ply + 1, False)
+        cutoff = null_score <= alpha
+      position.unmake_null_move()
+
+      if self.search_stopped:
+        return 0, None
+      if cutoff:
+        self.null_move_cutoffs += 1
+        return null_bound, None
+
+    all_moves = self.get_all_moves(position, ply)
     self.total_moves_found += len(all_moves)
 
-    for piece, move in all_moves:
-      position = self.simulate_move(piece, board, game, move, max_player)
-      self.draw_AI_calculations(game, piece, position)
-      current_score, _ = self.minimax(position, game, depth - 1, alpha, beta, other_player)
-      self.undo_move(board, game)
+    # no legal moves means checkmate or stalemate, and a faster checkmate is a better one
+    if not all_moves:
+      if not in_check:
+        return 0, None
+      return (ply - MATE_SCORE, None) if max_player == self.WHITE else (MATE_SCORE - ply, None)
+
+    # the best move found by an earlier search of this position is the most likely to cause a cutoff
+    if tt_move is not None and tt_move in all_moves:
+      all_moves.remove(tt_move)
+      all_moves.insert(0, tt_move)
+
+    for index, move in enumerate(all_moves):
+      reduce = self.can_reduce_move(position, move, depth, ply, index, in_check)
+      position.make_move(move)
+      self.draw_AI_calculations(game, position, move)
+
+      # a late quiet move is first searched less deeply with a null window, and only searched again at full depth
+      # if it might be better than the best move so far
+      search_full_depth = True
+      if reduce and not position.in_check():
+        self.reduced_moves += 1
+        if max_player == self.WHITE:
+          current_score, _ = self.minimax(position, game, depth - 2, alpha, alpha + 1, other_player, ply + 1)
+          search_full_depth = current_score > alpha
+        else:
+          current_score, _ = self.minimax(position, game, depth - 2, beta - 1, beta, other_player, ply + 1)
+          search_full_depth = current_score < beta
+        if search_full_depth:
+          self.reduction_re_searches += 1
+
+      if search_full_depth:
+        current_score, _ = self.minimax(position, game, depth - 1, alpha, beta, other_player, ply + 1)
+      position.unmake_move()
+
+      # the scores of an interrupted search can't be trusted
+      if self.search_stopped:
+        break
 
       if max_player == self.WHITE:
         if current_score > best_score:
           best_score = current_score
-          best_move = (piece, move)
+          best_move = move
           alpha = max(alpha, best_score)
 
       if max_player == self.BLACK:
         if current_score < best_score:
           best_score = current_score
-          best_move = (piece, move)
+          best_move = move
           beta = min(beta, best_score)
 
       self.current_best_evaluation = best_score
+      if ply == 0:
+        self.root_best_move = best_move
 
       # if beta <= alpha, it means that the maximizing player already has a move with a better outcome than the current branch's best possible outcome
       # this means that we can can prune this branch to reduce unneccessary computations since we know that the maximizing player will never choose this branch
       # ASIDE: alpha-beta pruning assumes that both players are making optimal moves to maximize or minimize their respective scores
       if beta <= alpha:
+        if not position.is_capture(move) and not move_promotion(move):
+          self.store_quiet_cutoff(position, move, depth, ply)
         break
 
+    if self.search_stopped:
+      return 0, best_move
+
+    if best_score <= alpha_original:
+      bound = UPPER_BOUND
+    elif best_score >= beta_original:
+      bound = LOWER_BOUND
+    else:
+      bound = EXACT
+    self.transposition_table.store(position.hash, depth, score_to_tt(best_score, ply), bound, best_move)
+
     return best_score, best_move
 
-  def get_piece_value(self, piece):
+  def negamax(self, position, game, depth, alpha, beta, ply=0, allow_null_move=True):
     """
-    Calculate the value of a piece using material and positional evaluation.
+    Principal variation search (https://www.chessprogramming.org/Principal_Variation_Search) in negamax form, so scores
+    are from the point of view of the side to move. The first move is searched with the full window, and the others
+    with a null window that only proves they are no better. A move that turns out better is searched again.
+    The transposition table is shared with minimax, so its scores are stored from White's point of view.
     """
-    piece_key = (piece.color, piece.type, piece.row, piece.col)
-    if piece_key in self.piece_value_cache:
-      return self.piece_value_cache[piece_key]
+    if ply > 0 and (position.is_fifty_move_draw() or position.is_repetition(ply)):
+      return 0, None
+
+    sign = 1 if position.side == WHITE else -1
+    if depth == 0:
+      if self.quiescence:
+        low, high = (alpha, beta) if sign == 1 else (-beta, -alpha)
+        max_player = self.WHITE if sign == 1 else self.BLACK
+        return sign * self.quiescence_search(position, game, low, high, max_player, ply), None
+      return sign * self.evaluate_board(position), None
+
+    if self.check_search_stopped():
+      return 0, None
+
+    alpha_original = alpha
+    tt_move = None
+    entry = self.transposition_table.probe(position.hash)
+    if entry is not None:
+      _, entry_depth, entry_score, entry_bound, tt_move, _ = entry
+      entry_score = sign * score_from_tt(entry_score, ply)
+      if sign == -1 and entry_bound != EXACT:
+        entry_bound = LOWER_BOUND if entry_bound == UPPER_BOUND else UPPER_BOUND
+
+      # the root always searches its moves so that it returns a move that can be played
+      if ply > 0 and entry_depth >= depth:
+        if entry_bound == EXACT:
+          return entry_score, None
+        if entry_bound == LOWER_BOUND:
+          alpha = max(alpha, entry_score)
+        elif entry_bound == UPPER_BOUND:
+          beta = min(beta, entry_score)
+        if beta <= alpha:
+          return entry_score, None
+
+    in_check = position.in_check()
+    if allow_null_move and abs(beta) < MATE_THRESHOLD and self.can_try_null_move(position, depth, ply, in_check):
+      position.make_null_move()
+      null_score = -self.negamax(position, game, depth - 1 - self.NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1,
+                                 False)[0]
+      position.unmake_null_move()
+
+      if self.search_stopped:
+        return 0, None
+      if null_score >= beta:
+        self.null_move_cutoffs += 1
+        return beta, None
+
+    all_moves = self.get_all_moves(position, ply)
+    self.total_moves_found += len(all_moves)
 
-    piece_material, piece_eval_table = self.PIECE_EVALUATION_TABLES[(piece_key[0], piece_key[1])]
-    piece_index = (piece.row * 8) + piece.col
-    piece_value = piece_material + piece_eval_table[piece_index]
+    if not all_moves:
+      return (ply - MATE_SCORE if in_check else 0), None
 
-    # cache this for future lookups
-    self.piece_value_cache[piece_key] = piece_value
-    return piece_value
+    if tt_move is not None and tt_move in all_moves:
+      all_moves.remove(tt_move)
+      all_moves.insert(0, tt_move)
 
-  @Profiler.profile_function
-  def evaluate_board(self, board):
+    best_score, best_move = float("-inf"), None
+    for index, move in enumerate(all_moves):
+      reduce = self.can_reduce_move(position, move, depth, ply, index, in_check)
+      position.make_move(move)
+      self.draw_AI_calculations(game, position, move)
+      if index == 0:
+        score = -self.negamax(position, game, depth - 1, -beta, -alpha, ply + 1)[0]
+      else:
+        search_full_depth = True
+        if reduce and not position.in_check():
+          self.reduced_moves += 1
+          score = -self.negamax(position, game, depth - 2, -alpha - 1, -alpha, ply + 1)[0]
+          search_full_depth = score > alpha
+          if search_full_depth:
+            self.reduction_re_searches += 1
+
+        if search_full_depth:
+          score = -self.negamax(position, game, depth - 1, -alpha - 1, -alpha, ply + 1)[0]
+          if alpha < score < beta:
+            score = -self.negamax(position, game, depth - 1, -beta, -alpha, ply + 1)[0]
+      position.unmake_move()
+
+      if self.search_stopped:
+        break
+
+      if score > best_score:
+        best_score, best_move = score, move
+        alpha = max(alpha, score)
+        self.current_best_evaluation = sign * best_score
+        if ply == 0:
+          self.root_best_move = move
+
+      if alpha >= beta:
+        if not position.is_capture(move) and not move_promotion(move):
+          self.store_quiet_cutoff(position, move, depth, ply)
+        break
+
+    if self.search_stopped:
+      return 0, best_move
+
+    if best_score <= alpha_original:
+      bound = UPPER_BOUND if sign == 1 else LOWER_BOUND
+    elif best_score >= beta:
+      bound = LOWER_BOUND if sign == 1 else UPPER_BOUND
+    else:
+      bound = EXACT
+    self.transposition_table.store(position.hash, depth, score_to_tt(sign * best_score, ply), bound, best_move)
+
+    return best_score, best_move
+
+  def aspiration_search(self, position, game, depth, previous_score):
     """
-    Evaluate the board state, considering material and positional advantages.
+    Searches the root with negamax in a narrow window around the score of the previous iteration, which prunes more
+    than a full window. If the score falls outside the window, the window is widened and the root searched again.
+    Scores are from White's point of view, like the ones minimax returns.
+    """
+    sign = 1 if position.side == WHITE else -1
+    if depth == 1 or abs(previous_score) >= MATE_THRESHOLD:
+      score, move = self.negamax(position, game, depth, float("-inf"), float("inf"))
+      return sign * score, move
+
+    guess = sign * previous_score
+    delta = self.ASPIRATION_WINDOW
+    alpha, beta = guess - delta, guess + delta
+    while True:
+      score, move = self.negamax(position, game, depth, alpha, beta)
+      if self.search_stopped or alpha < score < beta:
+        return sign * score, move
+
+      delta *= 4
+      if score <= alpha:
+        alpha = guess - delta if delta < 1000 else float("-inf")
+      else:
+        beta = guess + delta if delta < 1000 else float("inf")
+
+  def quiescence_search(self, position, game, alpha, beta, max_player, ply):
     """
-    position_eval = 0
-    for row in board.board:
-      for piece in row:
-        if not piece:
+    Searches only captures and promotions until the position is quiet, so that the evaluation isn't taken in the middle
+    of an exchange. The side to move can also "stand pat" and keep the current evaluation instead of capturing.
+    A side in check has to get out of it, so then every move is searched.
+    https://www.chessprogramming.org/Quiescence_Search
+    """
+    if self.check_search_stopped():
+      return 0
+
+    in_check = position.in_check()
+    if in_check:
+      moves = self.get_all_moves(position)
+      if not moves:
+        return ply - MATE_SCORE if max_player == self.WHITE else MATE_SCORE - ply
+      best_score = float("-inf") if max_player == self.WHITE else float("inf")
+    else:
+      best_score = stand_pat = self.evaluate_board(position)
+      if max_player == self.WHITE:
+        if stand_pat >= beta:
+          return stand_pat
+        alpha = max(alpha, stand_pat)
+      else:
+        if stand_pat <= alpha:
+          return stand_pat
+        beta = min(beta, stand_pat)
+      moves = self.get_capture_moves(position)
+
+    other_player = self.BLACK if max_player == self.WHITE else self.WHITE
+    squares = position.squares
+    for move in moves:
+      # delta pruning: skip captures that can't bring the score back to alpha (or beta) even if the piece is won for free
+      if not in_check:
+        target = squares[move_to(move)]
+        gain = PIECE_MATERIAL[target % 6 if target != EMPTY else PAWN] + self.PROMOTION_VALUES[move_promotion(move)]
+        if max_player == self.WHITE and stand_pat + gain + self.DELTA_MARGIN <= alpha:
+          continue
+        if max_player == self.BLACK and stand_pat - gain - self.DELTA_MARGIN >= beta:
           continue
 
-        piece_key = (piece.color, piece.type, piece.row, piece.col)
-        if piece_key not in self.piece_value_cache:
-          self.piece_value_cache[piece_key] = self.get_piece_value(piece)
+      position.make_move(move)
+      self.draw_AI_calculations(game, position, move)
+      score = self.quiescence_search(position, game, alpha, beta, other_player, ply + 1)
+      position.unmake_move()
 
-        if piece.color == self.BLACK:
-          position_eval -= self.piece_value_cache[piece_key]
-        else:
-          position_eval += self.piece_value_cache[piece_key]
+      if self.search_stopped:
+        return 0
+
+      if max_player == self.WHITE:
+        if score > best_score:
+          best_score = score
+          alpha = max(alpha, score)
+      else:
+        if score < best_score:
+          best_score = score
+          beta = min(beta, score)
+
+      if beta <= alpha:
+        break
 
-    return position_eval
+    return best_score
+
+  def can_try_null_move(self, position, depth, ply, in_check):
+    """
+    Null move pruning (https://www.chessprogramming.org/Null_Move_Pruning) assumes that passing is the worst thing the
+    side to move can do. That is wrong in check, where passing is illegal, and in zugzwang, which happens mostly in
+    endgames where the side to move only has pawns left, so those positions are searched normally.
+    """
+    return (self.null_move_pruning and ply > 0 and depth > self.NULL_MOVE_REDUCTION and not in_check and
+            position.has_non_pawn_material(position.side))
+
+  def can_reduce_move(self, position, move, depth, ply, index, in_check):
+    """
+    Late move reductions (https://www.chessprogramming.org/Late_Move_Reductions): with good move ordering, quiet moves
+    late in the list rarely turn out best. Captures, promotions, killer moves and moves out of check are never reduced,
+    and neither are moves that give check (the caller checks that after making the move).
+    """
+    if not self.late_move_reductions or depth < 3 or index < self.LATE_MOVE_INDEX or in_check:
+      return False
+    if position.is_capture(move) or move_promotion(move):
+      return False
+    return ply >= MAX_PLY or move not in self.killer_moves[ply]
+
+  def store_quiet_cutoff(self, position, move, depth, ply):
+    """
+    Remembers a quiet move that caused a beta cutoff, so it is searched early in sibling positions (as a killer move)
+    and wherever else it can be played (through its history score).
+    """
+    if ply < MAX_PLY:
+      killers = self.killer_moves[ply]
+      if killers[0] != move:
+        killers[1] = killers[0]
+        killers[0] = move
+
+    # moves are from | to << 6, so the low 12 bits index the from/to table
+    self.history[position.side][move & 4095] += depth * depth
+
+  def age_move_ordering(self):
+    """
+    Called before every search. Killer moves belong to the plies of the last search so they are cleared, and history
+    scores are halved so that moves that were good in recent searches count the most.
+    """
+    for killers in self.killer_moves:
+      killers[0] = killers[1] = None
+    for history in self.history:
+      history[:] = [score >> 1 for score in history]
+
+  def new_search(self):
+    self.transposition_table.new_search()
+    self.age_move_ordering()
+
+  def check_search_stopped(self):
+    """
+    Sets search_stopped if the deadline has passed or the node limit is reached.
+    The clock is only looked at every 256 nodes since it is slow to check.
+    """
+    if self.search_deadline is not None and self.moves_evaluated % 256 == 0 and time.time() >= self.search_deadline:
+      self.search_stopped = True
+    if self.node_limit is not None and self.moves_evaluated >= self.node_limit:
+      self.search_stopped = True
+    return self.search_stopped
+
+  def iterative_deepening(self, position, game, time_budget_ms=None, max_depth=64, node_limit=None, report=None):
+    """
+    Searches to depth 1, 2, 3... until the time budget (in milliseconds) runs out, node_limit nodes were searched,
+    max_depth is reached or search_stopped is set. Without a time budget or node limit it searches to max_depth.
+    Each iteration searches the best moves of the previous one first, since they are stored in the transposition table.
+    If given, report(depth, score, move) is called after every completed iteration.
+    Returns the result of the deepest search that was completed. If even the first iteration was stopped, the move
+    is the best one it found so far, or the first move in the move ordering.
+    """
+    start_time = time.time()
+    self.new_search()
+    best_score, best_move = 0, None
+
+    # the limits hold from the first iteration on, which isn't cheap either with the quiescence search
+    self.search_deadline = None if time_budget_ms is None else start_time + time_budget_ms / 1000
+    self.node_limit = node_limit
+    self.root_best_move = None
+
+    for depth in range(1, max_depth + 1):
+      if self.algorithm == "pvs":
+        score, move = self.aspiration_search(position, game, depth, best_score)
+      else:
+        score, move = self.minimax(position, game, depth, float("-inf"), float("inf"), self.color)
+      if self.search_stopped or move is None:
+        break
+
+      best_score, best_move = score, move
+      if report is not None:
+        report(depth, best_score, best_move)
+
+      # searching deeper won't find a faster checkmate
+      if abs(best_score) >= MATE_THRESHOLD:
+        break
+
+      # the next iteration takes several times longer than this one, so don't start it if it can't finish
+      if time_budget_ms is not None and (time.time() - start_time) * 1000 >= time_budget_ms / 2:
+        break
+
+    if best_move is None and self.search_stopped:
+      best_move = self.root_best_move
+      if best_move is None:
+        moves = self.get_all_moves(position, 0)
+        best_move = moves[0] if moves else None
+
+    self.search_deadline = None
+    self.node_limit = None
+    self.search_stopped = False
+    return best_score, best_move
+
+  def get_principal_variation(self, position, move, max_length=64):
+    """
+    Returns the line the search expects after a move: the move, followed by the best moves stored in the
+    transposition table for the positions it leads to.
+    """
+    principal_variation = []
+    while move is not None and len(principal_variation) < max_length and move in position.legal_moves():
+      position.make_move(move)
+      principal_variation.append(move)
+
+      entry = self.transposition_table.probe(position.hash)
+      move = entry[4] if entry is not None else None
+
+    for _ in principal_variation:
+      position.unmake_move()
+    return principal_variation
+
+  def evaluate_board(self, position):
+    """
+    Evaluate the board state, considering material and positional advantages.
+    The position keeps its evaluation up to date as pieces move, so this is just a lookup.
+    """
+    if self.debug_evaluation:
+      full_evaluation = position.calculate_evaluation()
+      assert position.evaluation == full_evaluation, \
+        f"incremental evaluation {position.evaluation} doesn't match full scan {full_evaluation}"
+
+    return position.evaluation
 
   @Profiler.profile_function
-  def get_all_moves(self, board, game, color):
+  def get_all_moves(self, position, ply=None):
     """
-    Generates all possible moves for each piece that the player owns.
+    Generates all legal moves for the player to move. Captures come first, then the killer moves of the ply (if given),
+    then the other quiet moves by their history score.
     """
     all_moves = []
     passive_moves = []
     moves_with_capture = []
 
-    for piece in board.get_all_pieces(color):
-      if isinstance(piece, pawn.Pawn):
-        piece.update_valid_moves(board.board, game.move_history.move_log)
+    for move in position.legal_moves():
+      if position.is_capture(move) or move_promotion(move):
+        moves_with_capture.append(move)
       else:
-        piece.update_valid_moves(board.board)
+        passive_moves.append(move)
 
-      for row, col in piece.valid_moves:
-        if board.board[row][col] != 0 and board.get_piece(row, col).color != color:
-          moves_with_capture.append((piece, (row, col)))
-        else:
-          passive_moves.append((piece, (row, col)))
+    moves_with_capture = self.order_moves(moves_with_capture, position)
 
-    moves_with_capture = self.order_moves(moves_with_capture, board.board)
+    history = self.history[position.side]
+    passive_moves.sort(key=lambda move: history[move & 4095], reverse=True)
+    if ply is not None and ply < MAX_PLY:
+      for killer in reversed(self.killer_moves[ply]):
+        if killer is not None and killer in passive_moves:
+          passive_moves.remove(killer)
+          passive_moves.insert(0, killer)
 
     # by using move ordering and putting moves where the AI captured a piece first, we evaluate the moves
     # that are likely to be the strongest earlier in the search tree, making alpha-beta pruning more efficient.
@@ -146,131 +592,203 @@ class Computer(object):
     all_moves.extend(passive_moves)
     return all_moves
 
-  @Profiler.profile_function
-  def order_moves(self, moves, board):
-    def mvv_lva(move):  # https://www.chessprogramming.org/MVV-LVA
-      piece, (targetRow, targetCol) = move
+  def get_capture_moves(self, position):
+    """
+    Generates the legal captures and promotions for the player to move, best first.
+    """
+    moves = [move for move in position.legal_moves() if position.is_capture(move) or move_promotion(move)]
+    return self.order_moves(moves, position)
 
-      piece_key = (piece.color, piece.type, piece.row, piece.col)
-      if piece_key not in self.piece_value_cache:
-        self.piece_value_cache[piece_key] = self.get_piece_value(piece)
-      
-      target = board[targetRow][targetCol]
-      target_key = (target.color, target.type, target.row, target.col)
-      if target_key not in self.piece_value_cache:
-        self.piece_value_cache[target_key] = self.get_piece_value(target)
+  def order_moves(self, moves, position):
+    squares = position.squares
+    piece_values = self.piece_values
 
-      return self.piece_value_cache[target_key] - self.piece_value_cache[piece_key]
+    def mvv_lva(move):  # https://www.chessprogramming.org/MVV-LVA
+      from_square, to_square = move_from(move), move_to(move)
+      target = squares[to_square]
+
+      # en passant captures and promotions can move to an empty square
+      target_value = piece_values[target][to_square] if target != EMPTY else 0
+      target_value += self.PROMOTION_VALUES[move_promotion(move)]
+      return target_value - piece_values[squares[from_square]][from_square]
 
     return sorted(moves, key=mvv_lva, reverse=True)
 
-  def draw_AI_calculations(self, game, piece, board):
+  def draw_AI_calculations(self, game, position, move):
     """
-    If the user has enabled the visualize AI feature, show the current position that the AI is considering after every move.
+    If the user has enabled the visualize AI feature, publish the position that the AI is considering for the game
+    window to draw. The search never draws itself: snapshots go to the game's SnapshotChannel, at most as often as
+    the window can show them.
     """
     self.moves_evaluated += 1
 
-    if not game.board.show_AI_calculations:
+    if game is None or not game.board.show_AI_calculations:
       return
 
+    # the slower speeds hold the search back on purpose, so that every position can be followed
     if game.board.AI_speed == "Medium":
-      pygame.time.delay(20)
+      time.sleep(0.02)
     elif game.board.AI_speed == "Slow":
-      pygame.time.delay(50)
+      time.sleep(0.05)
 
-    self.draw_moves(piece, game, board)
+    if game.search_snapshots.ready():
+      game.search_snapshots.publish(self.take_snapshot(position))
 
   @Profiler.profile_function
-  def simulate_move(self, piece, board, game, move, color):
+  def simulate_move(self, piece, board, game, move, color, promotion=queen.Queen):
     """
-    Simulates a move on the board.
+    Simulates a move on the board, updating the position hash incrementally.
     """
     target = board.get_piece(move[0], move[1])
+    en_passant_pawn = board.en_passant_pawn
+
+    # a pawn moving diagonally onto an empty square is capturing en passant
+    if isinstance(piece, pawn.Pawn) and target == 0 and move[1] != piece.col and en_passant_pawn is not None:
+      target = en_passant_pawn
 
     board.prev_square = (piece.row, piece.col)
     board.piece = piece
     board.target = (move[0], move[1])
+    board.captured_piece = 0
 
     # Save state for undoing the move
-    board.stored_moves.append({
-      'piece': piece,
-      'from': board.prev_square,
-      'to': move,
-      'captured': target,
-      'can_castle': getattr(piece, 'can_castle', None),
-    })
+    stored_move = board.push_stored_move()
+    stored_move.piece = piece
+    stored_move.from_square = board.prev_square
+    stored_move.to_square = move
+    stored_move.captured = target
+    stored_move.can_castle = getattr(piece, 'can_castle', None)
+    stored_move.en_passant = en_passant_pawn
+    stored_move.hash = board.hash
+    stored_move.rook = None
+    stored_move.rook_from = None
+    stored_move.promoted = False
+
+    castling_rights = board.get_castling_rights()
+
+    # an en passant capture is only available for a single move
+    board.hash = zobrist_hashing.update_en_passant(board.hash, board.get_en_passant_file(), None)
+    if board.en_passant_pawn is not None:
+      board.en_passant_pawn.vulnerable_to_en_passant = False
+      board.en_passant_pawn = None
 
     # simulating a castling move
     if isinstance(piece, king.King) and isinstance(target, rook.Rook) and piece.color == target.color:
-      game.castle(piece, target, game.get_dangerous_squares(), board)
-      board.stored_moves[-1]['rook'] = target
-      board.stored_moves[-1]['rook_from'] = (move[0], move[1])
+      if game.castle(piece, target, board):
+        board.hash = zobrist_hashing.update_hash(
+          board.hash, piece, board.get_square(*board.prev_square), board.get_square(piece.row, piece.col))
+        board.hash = zobrist_hashing.update_hash(
+          board.hash, target, board.get_square(move[0], move[1]), board.get_square(target.row, target.col))
+      stored_move.rook = target
+      stored_move.rook_from = (move[0], move[1])
 
     else:
       # simulating capturing opponents piece
       if target != 0 and target.color != color:
-        board.board[move[0]][move[1]] = 0
+        board.set_piece(target.row, target.col, 0)
         board.captured_piece = target
+        board.hash = zobrist_hashing.update_hash(board.hash, target, board.get_square(target.row, target.col), None)
 
       board.move(piece, move[0], move[1])
+      board.hash = zobrist_hashing.update_hash(
+        board.hash, piece, board.get_square(*board.prev_square), board.get_square(move[0], move[1]))
 
       if game.detect_promotion(piece):
-        # for simplicity, the computer will always promote to a queen
-        board.board[piece.row][piece.col] = queen.Queen(piece.row, piece.col, piece.color)
-        board.stored_moves[-1]['promoted'] = True
+        promoted_piece = promotion(piece.row, piece.col, piece.color)
+        board.set_piece(piece.row, piece.col, promoted_piece)
+        stored_move.promoted = True
+        board.hash = zobrist_hashing.update_hash(board.hash, piece, board.get_square(move[0], move[1]), None)
+        board.hash = zobrist_hashing.update_hash(board.hash, promoted_piece, None, board.get_square(move[0], move[1]))
+
+      # a pawn that moves two squares can be captured en passant on the next move
+      elif isinstance(piece, pawn.Pawn) and abs(move[0] - board.prev_square[0]) == 2:
+        piece.vulnerable_to_en_passant = True
+        board.en_passant_pawn = piece
+        board.hash = zobrist_hashing.update_en_passant(board.hash, None, piece.col)
 
     # after a rook or king moves, it can no longer castle
     if isinstance(piece, (rook.Rook, king.King)):
       piece.can_castle = False
 
+    board.hash = zobrist_hashing.update_castling(board.hash, castling_rights, board.get_castling_rights())
+    board.hash = zobrist_hashing.update_side(board.hash)
     return board
 
   @Profiler.profile_function
   def undo_move(self, board, game):
     # Restore previous move data
-    move_data = board.stored_moves.pop()
-    piece = move_data['piece']
-    from_square = move_data['from']
-    to_square = move_data['to']
-    captured_piece = move_data['captured']
-    can_castle = move_data['can_castle']
+    stored_move = board.pop_stored_move()
+    piece = stored_move.piece
+    from_square = stored_move.from_square
+    to_square = stored_move.to_square
+    captured_piece = stored_move.captured
+    can_castle = stored_move.can_castle
 
     # Undo castling moves
-    if isinstance(piece, king.King) and move_data.get('rook'):
-      rook_piece = move_data.get('rook')  # Retrieve stored rook
-      if rook_piece:
-        rook_from = move_data['rook_from']
+    if isinstance(piece, king.King) and stored_move.rook is not None:
+      # Ensure the rook moves back to its original position
+      rook_piece = stored_move.rook
+      board.move(rook_piece, stored_move.rook_from[0], stored_move.rook_from[1])
+      rook_piece.can_castle = True
 
-        # Ensure the rook moves back to its original position
-        board.move(rook_piece, rook_from[0], rook_from[1])
+    # Undo any pawn promotion by putting the pawn back in place of the queen
+    if stored_move.promoted:
+      board.set_piece(to_square[0], to_square[1], piece)
 
     # Revert the piece's position
     board.move(piece, from_square[0], from_square[1])
 
-    # Restore the captured piece, if any
+    # Restore the captured piece, if any (a pawn captured en passant is not on the target square)
     if captured_piece and captured_piece.color != piece.color:
-      board.board[to_square[0]][to_square[1]] = captured_piece
+      board.set_piece(captured_piece.row, captured_piece.col, captured_piece)
       board.captured_piece = 0
 
-    # Undo any pawn promotion
-    if isinstance(piece, queen.Queen) and move_data.get('promoted'):
-      board.board[from_square[0]][from_square[1]] = pawn.Pawn(from_square[0], from_square[1], piece.color)
-
     # Restore the castling ability for rook or king if it was altered
     if isinstance(piece, (king.King, rook.Rook)) and can_castle is not None:
       piece.can_castle = can_castle
 
-  def draw_moves(self, piece, game, board):
-    valid_moves = piece.valid_moves
-    game.update_screen(valid_moves, board)
+    # Restore en passant state
+    if isinstance(piece, pawn.Pawn):
+      piece.vulnerable_to_en_passant = False
+    board.en_passant_pawn = stored_move.en_passant
+    if board.en_passant_pawn is not None:
+      board.en_passant_pawn.vulnerable_to_en_passant = True
+
+    board.hash = stored_move.hash
+
+  def take_snapshot(self, position):
+    # the moves made since the root of the search are in the undo records of the position
+    line = [record.move for record in position.undo_stack[:position.ply]]
+    return SearchSnapshot(position.squares[:], line, self.root_best_move, self.current_best_evaluation,
+                          self.moves_evaluated, self.total_moves_found)
 
   def reset_visualizer_stats(self):
     self.moves_evaluated = 0
     self.total_moves_found = 0
     self.current_best_evaluation = 0
+    self.root_best_move = None
+    self.null_move_cutoffs = 0
+    self.reduced_moves = 0
+    self.reduction_re_searches = 0
+
+  def get_board_move(self, board, move):
+    """
+    Translates a move found by the search into the (piece, target square, promotion) form that simulate_move takes.
+    """
+    from_row, from_col = board.get_square(*divmod(move_from(move), 8))
+    to_row, to_col = board.get_square(*divmod(move_to(move), 8))
+    piece = board.get_piece(from_row, from_col)
+
+    # castling is played on the board by moving the king onto its rook
+    if isinstance(piece, king.King) and abs(to_col - from_col) == 2:
+      to_col = 7 if to_col > from_col else 0
+
+    promotion = self.PROMOTION_PIECES[move_promotion(move)] or queen.Queen
+    return piece, (to_row, to_col), promotion
 
   def computer_move(self, game, move):
-    board = self.simulate_move(move[0], game.board, game, move[1], self.color)
+    piece, target, promotion = self.get_board_move(game.board, move)
+    board = self.simulate_move(piece, game.board, game, target, self.color, promotion)
     game.board.board = board.board
 
     if isinstance(board.piece, pawn.Pawn):
@@ -293,10 +811,12 @@ class Computer(object):
               board.target[1]) + str(abs(8 - board.target[0]))
     if board.captured_piece != 0 and board.captured_piece.color != board.piece.color:
       game.capture(board.captured_piece)
+    if isinstance(board.piece, pawn.Pawn) and game.board.get_piece(*board.target) is not board.piece:
+      game.status.promote(board.piece, game.board.get_piece(*board.target))
     game.move_history.move_log.append(board.move_notation)
     game.board.previous_move = [
       (board.prev_square[0], board.prev_square[1]), (board.target[0], board.target[1])]
-    game.update_game()
+    game.update_game(reset_halfmove_clock=isinstance(board.piece, pawn.Pawn) or board.captured_piece != 0)
     game.check_game_status()
 
     self.profiler.print_profile_summary(self.moves_evaluated)
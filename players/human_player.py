@@ -25,7 +25,7 @@ class Human(object):
       piece = self.game.board.get_piece(row, col)
       if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen, King)) and piece.color == self.game.turn:
         self.selected_piece = piece
-        self.game.update_all_valid_moves()
+        self.game.update_valid_moves(piece)
         self.valid_moves = piece.valid_moves
         return True
 
@@ -88,8 +88,7 @@ class Human(object):
 
     # Player is trying to castle
     if isinstance(self.selected_piece, King) and isinstance(piece, Rook) and self.selected_piece.color == piece.color and (row, col) in self.valid_moves:
-      dangerous_squares = self.game.get_dangerous_squares()
-      if self.game.castle(self.selected_piece, piece, dangerous_squares, self.game.board):
+      if self.game.castle(self.selected_piece, piece, self.game.board):
         move_str = self.game.board.move_notation
         move_str = self.game.move_creates_check(move_str)
         self.game.move_history.move_log.append(move_str)
@@ -99,13 +98,13 @@ class Human(object):
 
     # Capturing an enemy piece
     if isinstance(piece, (Pawn, Knight, Bishop, Rook, Queen)) and self.selected_piece.color != piece.color:
-      self.game.board.board[row][col] = 0
+      self.game.board.set_piece(row, col, 0)
       self.game.board.move(self.selected_piece, row, col)
 
       # If moving the piece puts you in check, undo it
       if self.game.king_checked():
         self.game.board.move(self.selected_piece, prev_row, prev_col)
-        self.game.board.board[row][col] = piece
+        self.game.board.set_piece(row, col, piece)
         return False
       else:
         if isinstance(self.selected_piece, (Rook, King)):
@@ -127,15 +126,23 @@ class Human(object):
         move_str = self.game.move_creates_check(move_str)
         self.game.move_history.move_log.append(move_str)
         self.game.board.previous_move = [(prev_row, prev_col), (row, col)]
-        self.game.update_game()
+        self.game.update_game(reset_halfmove_clock=True)
 
     # Moving to an empty square
     if self.selected_piece and piece == 0 and (row, col) in self.valid_moves:
+      # A pawn moving diagonally onto an empty square captures en passant
+      en_passant_pawn = None
+      if isinstance(self.selected_piece, Pawn) and col != prev_col and self.game.board.en_passant_pawn is not None:
+        en_passant_pawn = self.game.board.en_passant_pawn
+        self.game.board.set_piece(en_passant_pawn.row, en_passant_pawn.col, 0)
+
       self.game.board.move(self.selected_piece, row, col)
 
       # If moving the piece puts you in check, undo it
       if self.game.king_checked():
         self.game.board.move(self.selected_piece, prev_row, prev_col)
+        if en_passant_pawn is not None:
+          self.game.board.set_piece(en_passant_pawn.row, en_passant_pawn.col, en_passant_pawn)
         return False
       else:
         if isinstance(self.selected_piece, (Knight, Bishop, Rook, Queen, King)):
@@ -153,30 +160,13 @@ class Human(object):
           else:
             self.selected_piece.vulnerable_to_en_passant = False
 
-          # Pawn captures by en passant
-          if self.selected_piece.direction == "Up":
-            piece = self.game.board.board[self.selected_piece.row +
-                                          1][self.selected_piece.col]
-            if isinstance(piece, Pawn):
-              self.game.board.board[self.selected_piece.row +
-                                    1][self.selected_piece.col] = 0
-              self.game.capture(piece)
-              move_str = self.game.move_history.get_file(
-                col) + "x" + str(abs(8 - row))
-
-            else:
-              move_str = self.game.move_history.get_file(
-                col) + str(abs(8 - row))
+          if en_passant_pawn is not None:
+            self.game.capture(en_passant_pawn)
+            move_str = self.game.move_history.get_file(
+              prev_col) + "x" + self.game.move_history.get_file(col) + str(abs(8 - row))
 
           else:
-            piece = self.game.board.board[self.selected_piece.row - 1][self.selected_piece.col]
-            if isinstance(piece, Pawn):
-              self.game.board.board[self.selected_piece.row - 1][self.selected_piece.col] = 0
-              self.game.capture(piece)
-              move_str = self.game.move_history.get_file(col) + "x" + str(abs(8 - row))
-
-            else:
-              move_str = self.game.move_history.get_file(col) + str(abs(8 - row))
+            move_str = self.game.move_history.get_file(col) + str(abs(8 - row))
 
           if self.game.detect_promotion(self.selected_piece):
             self.promoting = True
@@ -184,10 +174,11 @@ class Human(object):
         move_str = self.game.move_creates_check(move_str)
         self.game.move_history.move_log.append(move_str)
         self.game.board.previous_move = [(prev_row, prev_col), (row, col)]
-        self.game.update_game()
+        self.game.update_game(reset_halfmove_clock=isinstance(self.selected_piece, Pawn))
 
-    # Check if stalemate or checkmate
-    self.game.check_game_status()
+    # Check if stalemate or checkmate, which for a promotion waits until the piece is chosen
+    if not self.promoting:
+      self.game.check_game_status()
 
     # Reset selected piece
     if not self.game.detect_promotion(self.selected_piece):
@@ -199,6 +190,12 @@ class Human(object):
     return True
 
   def promote(self, choice, row, col):
-    self.game.board.board[row][col] = choice(row, col, self.color)
+    promoted_piece = choice(row, col, self.color)
+    self.game.status.promote(self.game.board.get_piece(row, col), promoted_piece)
+    self.game.board.set_piece(row, col, promoted_piece)
     self.promoting = False
-    self.game.board.material.update_advantages(self.game.board)
+    self.game.board.update_hash(self.game.turn)
+    # the move is only complete now, so this is where the position is recorded and the game status is checked
+    self.game.record_position(True)
+    self.game.update_status()
+    self.game.check_game_status()
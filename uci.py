@@ -0,0 +1,217 @@
+import sys
+import threading
+import time
+from game.position import Position, START_FEN, move_name
+from game.transposition import TranspositionTable, mate_in_moves
+from pieces.piece import WHITE, COLOR_NAMES
+from players.computer_player import Computer
+
+# Play the engine in a chess GUI or tournament manager that speaks UCI (http://wbec-ridderkerk.nl/html/UCIProtocol.html)
+# by running "python uci.py" as the engine command.
+
+ENGINE_NAME = "Chess w/ Minimax Visualizer"
+ENGINE_AUTHOR = "Jeffery Xie"
+
+# When playing on a clock without movestogo, assume the game lasts this many more moves
+DEFAULT_MOVES_TO_GO = 30
+
+# Milliseconds kept in reserve for communication with the GUI
+MOVE_OVERHEAD = 50
+
+
+class UCIEngine(object):
+  """
+  Reads UCI commands and answers them. Searches run on their own thread, so "stop" and "isready" are answered
+  while the engine is thinking.
+  """
+
+  def __init__(self, output=sys.stdout):
+    self.output = output
+    self.output_lock = threading.Lock()
+    self.computer = Computer("White")
+    self.position = Position.from_fen(START_FEN)
+    self.search_thread = None
+    self.search_start = 0
+
+    # Set by "stop". An infinite search that ends on its own (at its depth limit or on a checkmate) waits for it
+    # before sending its best move, as the protocol requires
+    self.stop_requested = threading.Event()
+
+  def send(self, line):
+    # the search thread sends info lines while the main thread answers commands
+    with self.output_lock:
+      self.output.write(line + "\n")
+      self.output.flush()
+
+  def run(self, lines=sys.stdin):
+    for line in lines:
+      if not self.handle_command(line):
+        break
+    self.stop_search()
+
+  def handle_command(self, line):
+    """
+    Handles a single command. Returns False when the engine should quit.
+    """
+    tokens = line.split()
+    if not tokens:
+      return True
+
+    command, arguments = tokens[0], tokens[1:]
+    if command == "uci":
+      self.send(f"id name {ENGINE_NAME}")
+      self.send(f"id author {ENGINE_AUTHOR}")
+      self.send("option name Hash type spin default 16 min 1 max 1024")
+      self.send("option name Algorithm type combo default minimax " + " ".join(f"var {name}" for name in Computer.ALGORITHMS))
+      self.send("option name NullMove type check default true")
+      self.send("option name LateMoveReductions type check default true")
+      self.send("uciok")
+    elif command == "isready":
+      self.send("readyok")
+    elif command == "setoption":
+      self.set_option(arguments)
+    elif command == "ucinewgame":
+      self.stop_search()
+      self.computer.transposition_table.clear()
+    elif command == "position":
+      self.stop_search()
+      self.set_position(arguments)
+    elif command == "go":
+      self.stop_search()
+      self.go(arguments)
+    elif command == "stop":
+      self.stop_search()
+    elif command == "quit":
+      return False
+    return True
+
+  def set_option(self, arguments):
+    # setoption name <name> value <value>
+    if "name" not in arguments or "value" not in arguments:
+      return
+    name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")])
+    value = " ".join(arguments[arguments.index("value") + 1:])
+
+    self.stop_search()
+    if name.lower() == "algorithm" and value.lower() in Computer.ALGORITHMS:
+      self.computer.algorithm = value.lower()
+    elif name.lower() == "hash" and value.isdigit():
+      self.computer.transposition_table = TranspositionTable(max(1, int(value)))
+    elif name.lower() == "nullmove" and value.lower() in ("true", "false"):
+      self.computer.null_move_pruning = value.lower() == "true"
+    elif name.lower() == "latemovereductions" and value.lower() in ("true", "false"):
+      self.computer.late_move_reductions = value.lower() == "true"
+
+  def set_position(self, arguments):
+    # position [startpos | fen <fen>] [moves <move1> ... <movei>]
+    moves = []
+    if "moves" in arguments:
+      moves = arguments[arguments.index("moves") + 1:]
+      arguments = arguments[:arguments.index("moves")]
+
+    try:
+      if arguments and arguments[0] == "fen":
+        position = Position.from_fen(" ".join(arguments[1:]))
+      else:
+        position = Position.from_fen(START_FEN)
+    except ValueError as error:
+      self.send(f"info string invalid position: {error}")
+      return
+
+    for name in moves:
+      move = self.find_move(position, name)
+      if move is None:
+        self.send(f"info string illegal move {name}")
+        break
+      position.make_move(move)
+
+    self.position = position
+
+  def find_move(self, position, name):
+    for move in position.legal_moves():
+      if move_name(move) == name:
+        return move
+    return None
+
+  def go(self, arguments):
+    # go [depth <x>] [movetime <ms>] [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>] [movestogo <x>] [nodes <x>] [infinite]
+    limits = {}
+    for i, argument in enumerate(arguments[:-1]):
+      if arguments[i + 1].lstrip("-").isdigit():
+        limits[argument] = int(arguments[i + 1])
+
+    max_depth = limits.get("depth", 64)
+    node_limit = limits.get("nodes")
+    time_budget = self.get_time_budget(limits, self.position.side)
+
+    self.computer.color = COLOR_NAMES[self.position.side]
+    self.computer.search_stopped = False
+    self.stop_requested.clear()
+    infinite = "infinite" in arguments
+    self.search_thread = threading.Thread(target=self.search, args=(max_depth, time_budget, node_limit, infinite))
+    self.search_thread.start()
+
+  def get_time_budget(self, limits, side):
+    """
+    Returns the time to spend on a move in milliseconds, or None to search until the depth or node limit or a stop.
+    """
+    if "movetime" in limits:
+      return max(1, limits["movetime"] - MOVE_OVERHEAD)
+
+    time_left = limits.get("wtime" if side == WHITE else "btime")
+    if time_left is None:
+      return None
+
+    increment = limits.get("winc" if side == WHITE else "binc", 0)
+    moves_to_go = limits.get("movestogo", DEFAULT_MOVES_TO_GO)
+    budget = time_left / max(1, moves_to_go) + increment * 3 / 4
+    return max(1, min(budget, time_left / 2) - MOVE_OVERHEAD)
+
+  def search(self, max_depth, time_budget, node_limit, infinite=False):
+    position = self.position
+    self.computer.reset_visualizer_stats()
+    self.search_start = time.time()
+
+    # a search stopped during the first iteration still returns a move, so there is always one to play
+    _, move = self.computer.iterative_deepening(position, None, time_budget, max_depth, node_limit, self.send_info)
+
+    self.computer.profiler.reset_profiler()
+    if infinite:
+      self.stop_requested.wait()
+    self.send(f"bestmove {move_name(move) if move is not None else '0000'}")
+
+  def send_info(self, depth, score, move):
+    elapsed_time = time.time() - self.search_start
+    nodes = self.computer.moves_evaluated
+    principal_variation = self.computer.get_principal_variation(self.position, move, depth)
+    self.send(f"info depth {depth} score {self.score_name(score)} nodes {nodes} "
+              f"nps {int(nodes / max(elapsed_time, 1e-3))} time {int(elapsed_time * 1000)} "
+              f"pv {' '.join(move_name(pv_move) for pv_move in principal_variation)}")
+
+  def score_name(self, score):
+    """
+    The search scores positions from White's point of view, and UCI from the point of view of the side to move.
+    """
+    if self.position.side != WHITE:
+      score = -score
+
+    mate = mate_in_moves(score)
+    if mate is not None:
+      return f"mate {mate}"
+    return f"cp {int(score)}"
+
+  def stop_search(self):
+    if self.search_thread is not None:
+      self.computer.search_stopped = True
+      self.stop_requested.set()
+      self.search_thread.join()
+      self.search_thread = None
+      self.computer.search_stopped = False
+
+
+def main():
+  UCIEngine().run()
+
+
+if __name__ == "__main__":
+  main()